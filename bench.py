@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""Synthetic reports and benchmarks of the parsers and exporters of canal.py
+
+python bench.py generate DIR --nodes 200 --moments 100 --fictitious 20 --cycles 300
+python bench.py run [DIR] [--json results.json] [--compare results.json]
+
+Without DIR the reports are generated into a temporary directory with the same scale options.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import canal
+
+
+LOCAL_FILE = 'Report (Local Reduced Stress) 1.txt'
+ELASTIC_FILE = 'Report (Elastic Reduced Stress) 1.txt'
+CYCLE_FILE = 'Report (Accumulated Fatigue Damage) 1.txt'
+
+
+def fmt(value, digits=2):
+	"""Number with a decimal comma as the reports are written"""
+	return '{:.{}f}'.format(value, digits).replace('.', ',')
+
+
+def efmt(value):
+	return '{:.4E}'.format(value).replace('.', ',')
+
+
+def generate(directory, nodes=100, moments=50, fictitious=10, cycles=100, seed=1):
+	"""Write BaseMoments.txt and the three reports into directory and return the node numbers.
+
+	Every node has tables of two base moments (and of three components in the elastic and the
+	fatigue damage reports), only one of them is the table of the node in BaseMoments.
+	Elastic records after the moments are fictitious moments of the expanded history, they repeat
+	the temperature and the reduced stress of a local moment. ksi, lb and lh are dashes at random.
+	"""
+	rnd = random.Random(seed)
+	os.makedirs(directory, exist_ok=True)
+	numbers = rnd.sample(range(1, nodes * 20), nodes)
+	info = {}
+	lines = []
+	for num in numbers:
+		base_moment, component, damage = rnd.randint(1, moments), rnd.randint(1, 3), rnd.random() ** 4 * 3
+		info[num] = (base_moment, component)
+		lines.append('Calculation node: {}\n'.format(num))
+		lines.append('a = {}.\n'.format(efmt(damage)))
+		lines.append('Base calculated moment of time: {:,}\n'.format(base_moment))
+		lines.append('reduced sterss component: {}.\n\n'.format(component))
+	with open(os.path.join(directory, 'BaseMoments.txt'), mode='w') as f:
+		f.writelines(lines)
+	local = {}
+	with open(os.path.join(directory, LOCAL_FILE), mode='w') as f:
+		for num in numbers:
+			base_moment, component = info[num]
+			lines = ['> Calculation node {}\n'.format(num)]
+			for bm in rnd.sample([base_moment, base_moment % moments + 1], 2):
+				lines.append('>>moment {} -> calculation results Table\n'.format(bm))
+				lines.append('  id  temp  sx  sy  sz  s1  s2  s3\n')
+				rows = []
+				for moment in range(1, moments + 1):
+					temp, stress = round(rnd.uniform(20, 350), 1), [round(rnd.uniform(-300, 300), 2) for i in range(3)]
+					rows.append((temp, stress))
+					lines.append('{} {} 0,0 0,0 0,0 {} {} {}\n'.format(moment, fmt(temp, 1), *map(fmt, stress)))
+				if bm == base_moment:
+					local[num] = rows
+				lines.append('\n')
+			f.writelines(lines)
+	elastic = {}
+	dash = lambda: '-' if rnd.random() < 0.5 else str(rnd.randint(0, 9))
+	with open(os.path.join(directory, ELASTIC_FILE), mode='w') as f:
+		for num in numbers:
+			base_moment, component = info[num]
+			lines = ['> Calculation node {}\n'.format(num)]
+			for c in (1, 2, 3):
+				lines.append('> Component number {}\n'.format(c))
+				for bm in rnd.sample([base_moment, base_moment % moments + 1], 2):
+					lines.append('> Base calculated moment of time {}\n'.format(bm))
+					lines.append('   num   T   Rpe   nu   ksi   lb   lh   (sL)l   k   (sF)l\n')
+					lines.append('         C   MPa                           MPa          MPa\n')
+					rows = []
+					for moment in range(1, moments + fictitious + 1):
+						temp, stress = local[num][(moment if moment <= moments else rnd.randint(1, moments)) - 1]
+						sll = (stress[0] - stress[1], stress[1] - stress[2], stress[0] - stress[2])[c - 1]
+						sfl = round(sll * 1.5 + rnd.uniform(-1, 1), 2)
+						rows.append((moment, sfl))
+						lines.append('{} {} {} 0,3 {} {} {} {} 1,00 {}\n'.format(moment, fmt(temp, 1), fmt(rnd.uniform(100, 300), 1), dash(), dash(), dash(), fmt(sll), fmt(sfl)))
+					if bm == base_moment and c == component:
+						elastic[num] = rows
+					lines.append('\n')
+			f.writelines(lines)
+	with open(os.path.join(directory, CYCLE_FILE), mode='w') as f:
+		for num in numbers:
+			base_moment, component = info[num]
+			lines = ['> Calculation node: {}\n'.format(num)]
+			for c in (1, 2, 3):
+				lines.append('> Component number: {}\n'.format(c))
+				for bm in rnd.sample([base_moment, base_moment % moments + 1], 2):
+					lines.append('> Base calculated moment of time {}\n'.format(bm))
+					lines.append(' fid - sid  ...  sFmax  sFmin  saF  Tmin  Tmax  r  ...  [N]  N  a\n')
+					lines.append('                  MPa    MPa    MPa   C     C\n')
+					for i in range(cycles):
+						(fid, sfmax), (sid, sfmin) = rnd.choice(elastic[num]), rnd.choice(elastic[num])
+						a = rnd.random() ** 6 * 1E-2 if rnd.random() < 0.9 else 1E-12
+						lines.append(' '.join([str(fid), '-', str(sid), '0', '0', fmt(sfmax), fmt(sfmin), fmt(abs(sfmax - sfmin) / 2), fmt(20, 1), fmt(300, 1), fmt(rnd.uniform(-1, 1))]
+						                      + ['0'] * 8 + [fmt(rnd.uniform(1E3, 1E9), 0), fmt(rnd.choice([1, 1, 2, 5.5]), 1), efmt(a)]) + '\n')
+					lines.append('\n')
+			f.writelines(lines)
+	return numbers
+
+
+def measure(func, memory=True):
+	"""(seconds, peak traced bytes or None, result of func), memory is measured in a second run"""
+	start = time.perf_counter()
+	result = func()
+	seconds = time.perf_counter() - start
+	peak = None
+	if memory:
+		del result
+		tracemalloc.start()
+		try:
+			result = func()
+			peak = tracemalloc.get_traced_memory()[1]
+		finally:
+			tracemalloc.stop()
+	return seconds, peak, result
+
+
+def file_stats(file):
+	"""(bytes, lines) of file"""
+	with open(file, mode='rb') as f:
+		data = f.read()
+	return len(data), data.count(b'\n')
+
+
+def rows_of(manager_table):
+	return sum(len(i) for i in manager_table.values())
+
+
+def benchmarks(directory, output, backends=('list', 'array'), engines=('mmap', 'text')):
+	"""Yield (name, file or None, func), func returns the number of rows it handled.
+
+	Exporters write their files into the output directory.
+	"""
+	path = lambda name: os.path.join(directory, name)
+	bfile, lfile, efile, cfile = path('BaseMoments.txt'), path(LOCAL_FILE), path(ELASTIC_FILE), path(CYCLE_FILE)
+	nt = canal.NodeTable()
+	nt.parse_base_moments(bfile)
+	def base_moments():
+		table = canal.NodeTable()
+		table.parse_base_moments(bfile)
+		return len(table)
+	yield 'parse_base_moments', bfile, base_moments
+	if 'array' in backends:
+		def base_moments_array():
+			table = canal.NodeArrayTable()
+			table.parse_base_moments(bfile)
+			return len(table)
+		yield 'parse_base_moments array', bfile, base_moments_array
+	for backend in backends:
+		table = canal.node_table_type(backend).from_compact(nt.to_compact())
+		def damage_index(table=table):
+			return len(table.get_damage_index(100))
+		yield 'get_damage_index {}'.format(backend), None, damage_index
+	for backend in backends:
+		for engine in engines:
+			def local(backend=backend, engine=engine):
+				lmt = canal.LocalReducedStressManagerTable(nt, backend)
+				lmt.parse_local_redused_stress_file(lfile, engine=engine)
+				return rows_of(lmt)
+			def elastic(backend=backend, engine=engine):
+				emt = canal.ElasticReducedStressManagerTable(nt, None, backend)
+				emt.parse_elastic_reduced_stress_file(efile, engine=engine)
+				return rows_of(emt)
+			def cycles(backend=backend, engine=engine):
+				ctt = canal.CycleTypeManagerTable(nt, None, None, backend)
+				ctt.parse_accumulated_fatigue_damage_file(cfile, engine=engine)
+				return rows_of(ctt)
+			yield 'local {} {}'.format(engine, backend), lfile, local
+			yield 'elastic {} {}'.format(engine, backend), efile, elastic
+			yield 'cycles {} {}'.format(engine, backend), cfile, cycles
+		lmt = canal.LocalReducedStressManagerTable(nt, backend)
+		lmt.parse_local_redused_stress_file(lfile)
+		emt = canal.ElasticReducedStressManagerTable(nt, lmt, backend)
+		emt.parse_elastic_reduced_stress_file(efile)
+		ctt = canal.CycleTypeManagerTable(nt, lmt, emt, backend)
+		ctt.parse_accumulated_fatigue_damage_file(cfile)
+		def expansion(ctt=ctt, emt=emt):
+			for table in emt.values():
+				table.reset_expansion_index()
+			mlen = ctt.local_reduced_stress_manager_table.length_of_tables
+			return sum(len(list(canal.cycle_type_rows(ctt, node, 1E-8, True, False, mlen))) for node in ctt)
+		yield 'history expansion {}'.format(backend), None, expansion
+		rows = lambda ctt=ctt: sum(1 for i in canal.cycle_type_long_rows(ctt))
+		for name, save in (('xlsx', canal.save_in_workbook), ('csv', canal.save_in_csv), ('jsonl', canal.save_in_jsonl), ('parquet', canal.save_in_parquet)):
+			if name == 'parquet' and canal.pa is None:
+				continue
+			def export(ctt=ctt, name=name, save=save):
+				save(ctt, None, os.path.join(output, 'bench.{}'.format(name)))
+				return rows(ctt)
+			yield 'save {} {}'.format(name, backend), None, export
+		if backend == backends[0]:
+			def workbook_in_memory(ctt=ctt):
+				canal.save_in_workbook(ctt, None, os.path.join(output, 'bench.xlsx'), write_only=False)
+				return rows(ctt)
+			yield 'save xlsx in memory {}'.format(backend), None, workbook_in_memory
+
+
+def run(directory, backends=('list', 'array'), engines=('mmap', 'text'), memory=True, out=sys.stdout):
+	"""Run the benchmarks on the reports of directory and print a table, return {name: result dict}"""
+	results = {}
+	header = '{:<28}{:>9}{:>9}{:>12}{:>12}{:>10}'.format('benchmark', 'time, s', 'MB/s', 'lines/s', 'rows/s', 'peak, MB')
+	print(header, file=out)
+	stats = {}
+	output = tempfile.mkdtemp(prefix='canal-bench-output-')
+	try:
+		for name, file, func in benchmarks(directory, output, backends, engines):
+			results[name] = _run_one(name, file, func, memory, stats, out)
+	finally:
+		shutil.rmtree(output, ignore_errors=True)
+	return results
+
+
+def _run_one(name, file, func, memory, stats, out):
+	seconds, peak, rows = measure(func, memory)
+	result = {'seconds': seconds, 'rows': rows, 'peak': peak}
+	if file is not None:
+		if file not in stats:
+			stats[file] = file_stats(file)
+		result['bytes'], result['lines'] = stats[file]
+	print('{:<28}{:>9.3f}{:>9}{:>12}{:>12.0f}{:>10}'.format(name, seconds,
+	      '{:.1f}'.format(result['bytes'] / seconds / 2**20) if file else '-',
+	      '{:.0f}'.format(result['lines'] / seconds) if file else '-',
+	      rows / seconds,
+	      '{:.1f}'.format(peak / 2**20) if peak is not None else '-'), file=out)
+	out.flush()
+	return result
+
+
+def compare(results, reference, out=sys.stdout):
+	"""Print time ratios of results to the reference results of another run"""
+	print('{:<28}{:>9}{:>9}{:>9}'.format('benchmark', 'time, s', 'ref, s', 'ratio'), file=out)
+	for name, result in results.items():
+		if name in reference:
+			ref = reference[name]['seconds']
+			print('{:<28}{:>9.3f}{:>9.3f}{:>9.2f}'.format(name, result['seconds'], ref, result['seconds'] / ref if ref else float('nan')), file=out)
+
+
+def parse_args(arguments):
+	p = argparse.ArgumentParser('Synthetic reports and benchmarks of canal.py')
+	sp = p.add_subparsers(dest='command', required=True)
+	scale = argparse.ArgumentParser(add_help=False)
+	scale.add_argument('--nodes', type=int, default=100, help='number of nodes. default is 100')
+	scale.add_argument('--moments', type=int, default=50, help='number of moments of time of local tables. default is 50')
+	scale.add_argument('--fictitious', type=int, default=10, help='number of fictitious moments of elastic tables. default is 10')
+	scale.add_argument('--cycles', type=int, default=100, help='number of types of cycle of every table. default is 100')
+	scale.add_argument('--seed', type=int, default=1, help='seed of the random data. default is 1')
+	pg = sp.add_parser('generate', parents=[scale], help='write the reports into a directory')
+	pg.add_argument('directory', type=str)
+	pr = sp.add_parser('run', parents=[scale], help='run the benchmarks')
+	pr.add_argument('directory', type=str, nargs='?', help='directory with the reports, they are generated into a temporary directory by default')
+	pr.add_argument('--backends', nargs='+', choices=('list', 'array'), default=['list', 'array'], help='backends of the tables. default is list array')
+	pr.add_argument('--engines', nargs='+', choices=('mmap', 'text'), default=['mmap', 'text'], help='engines of the parsers. default is mmap text')
+	pr.add_argument('--no-memory', dest='memory', action='store_false', help="don't measure peak memory in the second run of every benchmark")
+	pr.add_argument('--json', type=str, help='save the results into this file')
+	pr.add_argument('--compare', type=str, help='compare times with the results saved with --json')
+	return p.parse_args(arguments)
+
+
+def main():
+	args = parse_args(sys.argv[1:])
+	if args.command == 'generate':
+		generate(args.directory, args.nodes, args.moments, args.fictitious, args.cycles, args.seed)
+		return
+	directory = args.directory
+	temporary = None
+	if directory is None:
+		temporary = directory = tempfile.mkdtemp(prefix='canal-bench-')
+		generate(directory, args.nodes, args.moments, args.fictitious, args.cycles, args.seed)
+	try:
+		results = run(directory, tuple(args.backends), tuple(args.engines), args.memory)
+	finally:
+		if temporary is not None:
+			shutil.rmtree(temporary, ignore_errors=True)
+	if args.json:
+		with open(args.json, mode='w') as f:
+			json.dump(results, f, indent=1)
+	if args.compare:
+		with open(args.compare, mode='r') as f:
+			compare(results, json.load(f))
+
+
+if __name__ == '__main__':
+	main()
@@ -5,20 +5,63 @@ import openpyxl
 from openpyxl.styles.borders import Border, Side
 from openpyxl.styles.alignment import Alignment
 from openpyxl.styles.fonts import Font
+from openpyxl.styles.named_styles import NamedStyle
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.utils import get_column_letter
 import collections
+import collections.abc
 import os
 import re
-import enum
 import argparse
 import math
+import sqlite3
+import pathlib
+import mmap
+import bisect
+import hashlib
+import heapq
+import itertools
+import concurrent.futures
+import csv
+import json
+import time
+import contextlib
+import io
+import glob
+import zipfile
+import traceback
+import tracemalloc
+import cProfile
+import pstats
+import gzip
+import lzma
+import bz2
+try:
+	import resource
+except ImportError:
+	resource = None
 try:
 	import numpy as np
+except ImportError:
+	np = None
+try:
+	import zstandard
+except ImportError:
+	zstandard = None
+try:
+	import pyarrow as pa
+	import pyarrow.parquet as pq
+except ImportError:
+	pa = None
+try:
 	import matplotlib.pyplot as plt
 	from matplotlib.widgets import RadioButtons as plt_rb
 	from matplotlib.lines import Line2D
+	from matplotlib.figure import Figure
+	from matplotlib.backends.backend_agg import FigureCanvasAgg
 except ImportError:
-	np = None
 	plt = None
+	Figure = None
 	
 def parse_args(arguments):
 	p = argparse.ArgumentParser('This is script to read an collect data from cycle vtu calculation')
@@ -29,12 +72,53 @@ def parse_args(arguments):
 	pf.add_argument('-c', action='store_false', help="Routine with this option doesn't expand history")
 	pf.add_argument('-a', action='store_true', help='add additional infromation into type cycles column')
 	p.add_argument('--limit', type=float, default=1E-8, help='set the limit of extracted types of cycle. default is 1E-8')
-	p.add_argument('--outfile', type=str, default='table.xlsx', help='name of output file, default = table.xlsx')
+	p.add_argument('--max-rows', type=int, help='keep only this number of types of cycle with the largest damage for every node')
+	p.add_argument('--outfile', type=str, help='name of output file, default = table.xlsx (table.csv, ... for other formats)')
+	p.add_argument('--format', choices=tuple(SAVERS), default='xlsx', help='format of output file, csv, parquet and jsonl contain one long table of all nodes. default is xlsx')
+	p.add_argument('--no-index', dest='index', action='store_false', help="don't use or create node offset index files next to the reports")
+	p.add_argument('--compile', type=str, help='parse whole reports and save them into this directory of column files')
+	p.add_argument('--store', type=str, help='read the model from a directory of column files made with --compile instead of the reports')
+	p.add_argument('--watch', type=float, metavar='SECONDS', help='check the reports which are being written with this interval, parse their new node blocks and save the output again. --cache, --compile, --store and --jobs are not used')
+	p.add_argument('--batch', nargs='+', metavar='DIR', help='run for every directory or glob pattern of directories in parallel processes, every case is saved into its own directory and the worst nodes of all cases into --summary. --watch and --profile are not used')
+	p.add_argument('--batch-jobs', type=int, default=os.cpu_count() or 1, help='number of cases of --batch which are processed at the same time. default is the number of CPUs')
+	p.add_argument('--summary', type=str, default='summary.csv', help='summary file of --batch, csv or xlsx by the extension. default is summary.csv')
+	p.add_argument('--profile', action='store_true', help='print wall and CPU time, size of the input files and bytes read from them, parsed rows and memory of every phase of the run')
+	p.add_argument('--profile-json', type=str, help='save the phases of --profile into this json file')
+	p.add_argument('--profile-memory', action='store_true', help='trace the peak of Python memory of every phase with tracemalloc, it slows the run')
+	p.add_argument('--cprofile', nargs='+', default=(), metavar='PHASE', help='run these phases of --profile under cProfile, e.g. cycles or save')
+	p.add_argument('--cache', type=str, help='directory of cached full parses of the reports, they are reused while the reports are unchanged')
+	p.add_argument('--cache-size', type=int, default=1024, help='size limit of the cache directory in MB, least recently used parses are removed. default is 1024')
+	p.add_argument('--jobs', type=int, default=1, help='number of worker processes for parsing of the reports. default is 1')
+	p.add_argument('--backend', choices=('list', 'array'), default='list', help='storage of the node table and the local reduced stress, elastic reduced stress and cycle type tables, array requires NumPy. default is list')
+	p.add_argument('--plot', nargs='+', choices=PLOT_FIELDS, metavar='FIELD', help='save a graph of the elastic reduced stress of every selected node without a display, the first field is x and the others are y, e.g. num sll sfl')
+	p.add_argument('--plot-dir', type=str, default='graphs', help='directory of the graphs of --plot. default is graphs')
+	p.add_argument('--plot-format', choices=('png', 'svg'), default='png', help='format of the graphs of --plot. default is png')
+	p.add_argument('--plot-points', type=int, default=PLOT_POINTS, help='longer lines of the graphs are reduced to about this number of points keeping their minimums and maximums. default is {}'.format(PLOT_POINTS))
+	p.add_argument('--analytics', type=str, metavar='FILE', help='sum the damage of the cycle types of every node of the whole model, compare it with BaseMoments, print damage statistics and save the nodes into this csv file. the whole cycle report is parsed unless --store or --compile is given')
+	p.add_argument('--analytics-rtol', type=float, default=1E-3, help='relative tolerance of the comparison of --analytics. default is 1E-3')
+	p.add_argument('--sqlite', type=str, metavar='FILE', help='parse whole reports (or read --store) and save the model into this SQLite database for the query command')
+	sp = p.add_subparsers(dest='command', metavar='query')
+	q = sp.add_parser('query', help='print the nodes or the cycle types selected from a database made with --sqlite as csv, the reports are not read')
+	q.add_argument('database', type=str, help='SQLite database made with --sqlite')
+	q.add_argument('--cycles', action='store_true', help='select cycle types instead of nodes')
+	q.add_argument('--damage-above', type=float, help='nodes or cycle types with a larger damage')
+	q.add_argument('--saf-above', type=float, help='cycle types with a larger saf, implies --cycles')
+	q.add_argument('--component', type=int, choices=(1, 2, 3), help='nodes where this component governs or their cycle types')
+	q.add_argument('--moment', type=int, help='nodes whose worst cycle type involves this real moment (after history expansion, as in the output tables) or the cycle types involving it')
+	q.add_argument('--nodes', type=int, nargs='+', help='cycle types of these nodes, implies --cycles')
+	q.add_argument('--rows', type=int, help='print only this number of rows with the largest damage')
+	q.add_argument('--sql', type=str, help='run this read only SQL statement instead, see SQLiteStore for the tables')
 	r = p.parse_args(arguments)
+	if r.plot is not None and len(r.plot) < 2:
+		p.error('--plot needs the x field and at least one y field')
+	if r.max_rows is not None and r.max_rows < 1:
+		p.error('--max-rows must be at least 1')
 	return r
 
 
 class ChildMixin():
+	# the records with __slots__ have no __dict__ only when every base class declares __slots__
+	__slots__ = ()
 	def __init__(self, parent, parent_type, key=None):
 		if parent is None:
 			self._parent = None
@@ -54,6 +138,1180 @@ class ChildMixin():
 		else:
 			return self._parent()
 
+
+def scan_pattern(pattern):
+	"""Compile a byte pattern for ReportScanner, a space in pattern stands for any whitespace except line breaks"""
+	return re.compile(pattern.replace(' ', r'[^\S\r\n]').encode('ascii'))
+
+
+COMPRESSION_MAGIC = ((b'\x1f\x8b', 'gzip'), (b'\xfd7zXZ\x00', 'xz'), (b'BZh', 'bz2'), (b'\x28\xb5\x2f\xfd', 'zstd'))
+REPORT_BUFFER_SIZE = 1 << 20
+
+
+def compression(file):
+	"""Compression of file found by its magic bytes: 'gzip', 'xz', 'bz2', 'zstd' or None"""
+	with open(file, mode='rb') as f:
+		head = f.read(6)
+	for magic, name in COMPRESSION_MAGIC:
+		if head.startswith(magic):
+			return name
+	return None
+
+
+def open_report(file):
+	"""Text stream of a report or BaseMoments file read with a large buffer,
+	a compressed file is decompressed on the fly without temporary files (zstd requires zstandard)
+	"""
+	kind = compression(file)
+	if kind is None:
+		return open(file, mode='r', buffering=REPORT_BUFFER_SIZE)
+	if kind == 'gzip':
+		raw = gzip.open(file, mode='rb')
+	elif kind == 'xz':
+		raw = lzma.open(file, mode='rb')
+	elif kind == 'bz2':
+		raw = bz2.open(file, mode='rb')
+	else:
+		if zstandard is None:
+			raise ImportError('zstandard is required for zstd compressed reports')
+		raw = zstandard.ZstdDecompressor().stream_reader(open(file, mode='rb'), read_across_frames=True)
+	return io.TextIOWrapper(io.BufferedReader(raw, REPORT_BUFFER_SIZE))
+
+
+def replace_file(file, write):
+	"""Write file with write(f) into a temporary binary file which then replaces it,
+	so a reader never sees a partly written file"""
+	# the temporary file is created as the file would be, with the permissions of the umask
+	temp_file = '{}.{}.tmp'.format(file, os.urandom(8).hex())
+	try:
+		with open(temp_file, mode='xb') as f:
+			write(f)
+		os.replace(temp_file, file)
+	except BaseException:
+		try:
+			os.remove(temp_file)
+		except OSError:
+			pass
+		raise
+
+
+PLOT_POINTS = 4000
+
+
+def minmax_indices(values, max_points=PLOT_POINTS):
+	"""Sorted indices of at most about max_points values which keep the shape of a long series.
+
+	The series is split into max_points // 2 buckets and the minimum and the maximum of every bucket
+	are kept with the first and the last value, so no peak is lost.
+	"""
+	n = len(values)
+	if max_points is None or n <= max_points:
+		return np.arange(n)
+	buckets = max(max_points // 2, 1)
+	size = -(-n // buckets)
+	buckets = -(-n // size)
+	# the last bucket is padded with the last value, its indices are clipped back below
+	rows = np.concatenate((values, np.repeat(values[-1:], buckets * size - n))).reshape(buckets, size)
+	starts = np.arange(buckets) * size
+	indices = np.concatenate((starts + rows.argmin(axis=1), starts + rows.argmax(axis=1), (0, n - 1)))
+	return np.unique(np.minimum(indices, n - 1))
+
+
+class ReportScanner():
+	"""Byte level scanner of the node blocks of a report file.
+
+	The file is memory mapped, block headers are located with compiled byte patterns
+	over the mapped region and only the rows of the requested tables are split into tokens.
+	Patterns must capture the number in group 1 and must not match across lines.
+	"""
+	def __init__(self, file, node_pattern, component_pattern, base_moment_pattern, header):
+		self._file = file
+		self._node_pattern = node_pattern
+		self._component_pattern = component_pattern
+		self._base_moment_pattern = base_moment_pattern
+		self._header = header
+		self._f = None
+		self._mm = None
+		self._read_bytes = 0
+
+	@property
+	def file(self):
+		return self._file
+
+	@property
+	def read_bytes(self):
+		"""Bytes of the file consumed so far, the scanned node blocks or with an index only the tables read"""
+		return self._read_bytes
+
+	def __enter__(self):
+		self._f = open(self._file, mode='rb')
+		if os.fstat(self._f.fileno()).st_size:
+			self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+		else:
+			self._mm = b''
+		return self
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		if isinstance(self._mm, mmap.mmap):
+			self._mm.close()
+		self._f.close()
+		self._mm = None
+		self._f = None
+
+	def _next_line(self, pos):
+		eol = self._mm.find(b'\n', pos)
+		return len(self._mm) if eol < 0 else eol + 1
+
+	def nodes(self, start=0, end=None):
+		"""Yield (nodenum, start, end) for every node block in the byte range, start is the offset of the header line."""
+		mm = self._mm
+		if end is None:
+			end = len(mm)
+		current = None
+		for result in self._node_pattern.finditer(mm, start, end):
+			line_start = mm.rfind(b'\n', 0, result.start()) + 1
+			if current is not None:
+				yield current[0], current[1], line_start
+			current = (int(result.group(1)), line_start)
+		if current is not None:
+			yield current[0], current[1], end
+
+	def complete_end(self):
+		"""Offset following the last line break, a report which is being written may end with a part of a line"""
+		return self._mm.rfind(b'\n') + 1
+
+	def chunks(self, n):
+		"""Split the file into at most n byte ranges, every range starts at a node header line"""
+		mm = self._mm
+		size = len(mm)
+		bounds = []
+		for i in range(n):
+			result = self._node_pattern.search(mm, size * i // n)
+			if result is None:
+				break
+			line_start = mm.rfind(b'\n', 0, result.start()) + 1
+			if not bounds or line_start > bounds[-1]:
+				bounds.append(line_start)
+		return list(zip(bounds, bounds[1:] + [size]))
+
+	def find_table(self, start, end, component, base_moment):
+		"""Offset of the line following the header of the (component, base_moment) table or None."""
+		if self._component_pattern is not None:
+			for result in self._component_pattern.finditer(self._mm, start, end):
+				if int(result.group(1)) == component:
+					start = result.end()
+					break
+			else:
+				return None
+		for result in self._base_moment_pattern.finditer(self._mm, start, end):
+			if int(result.group(1)) == base_moment:
+				return self._next_line(result.end())
+		return None
+
+	def tables(self, start, end):
+		"""Yield ((component, base_moment), offset) for every table of the block, first occurrence only."""
+		components = []
+		if self._component_pattern is not None:
+			components = [(result.start(), int(result.group(1))) for result in self._component_pattern.finditer(self._mm, start, end)]
+		seen = set()
+		for result in self._base_moment_pattern.finditer(self._mm, start, end):
+			i = bisect.bisect(components, (result.start(),))
+			key = (components[i-1][1] if i else None, int(result.group(1)))
+			if key not in seen:
+				seen.add(key)
+				yield key, self._next_line(result.end())
+
+	def node_tables(self, necessary_table, index=None, start=0, end=None, wanted=None):
+		"""Yield (nodenum, offset) for every node which necessary_table(nodenum) returns a (component, base_moment) key for.
+
+		offset is None when the node block has no such table.
+		With index only the nodes of the wanted set are looked up, in the order of the file.
+		Without index only the node blocks in the byte range [start, end) are scanned
+		and scanning stops as soon as every node of the wanted set was yielded.
+		"""
+		if index is not None:
+			nodenums = index if wanted is None else sorted((i for i in wanted if i in index), key=lambda a: index[a][0])
+			for nodenum in nodenums:
+				key = necessary_table(nodenum)
+				if key is not None:
+					yield nodenum, index.block_offset(nodenum, *key)
+		else:
+			remaining = None if wanted is None else set(wanted)
+			for nodenum, block_start, block_end in self.nodes(start, end):
+				if remaining is not None and not remaining:
+					return
+				# the table read from the block is a part of it
+				read_bytes = self._read_bytes + block_end - block_start
+				key = necessary_table(nodenum)
+				if key is not None:
+					yield nodenum, self.find_table(block_start, block_end, *key)
+					if remaining is not None:
+						remaining.discard(nodenum)
+				self._read_bytes = read_bytes
+
+	def rows(self, offset, end=None):
+		"""Yield comma-decimal fixed token lists of the table lines starting at offset and ending before end."""
+		mm = self._mm
+		pos = offset
+		for i in range(self._header):
+			pos = self._next_line(pos)
+		if end is None:
+			end = len(mm)
+		self._read_bytes += min(pos, end) - offset
+		while pos < end:
+			eol = mm.find(b'\n', pos, end)
+			if eol < 0:
+				eol = end
+			self._read_bytes += min(eol + 1, end) - pos
+			yield mm[pos:eol].replace(b',', b'.').split()
+			pos = eol + 1
+
+	TABLE_LINES_PATTERN = re.compile(rb'(?:[ \t]*\d[^\n]*(?:\n|\Z))*')
+
+	def table_records(self, offset, fields, columns, dash=None, end=None):
+		"""Structured array of the table lines starting at offset converted by NumPy at once.
+
+		The table ends before the first line which doesn't start with a digit. Only the columns
+		(indices of line tokens, negative from the end of a line) are converted into the fields.
+		With dash a lone '-' is replaced by this token, e.g. b'nan' for float fields.
+		Nothing is read past end, e.g. the part of a line which is still being written.
+		None is returned without NumPy or when a used token can't be converted,
+		rows() has to read such a table to stop at the same line as before.
+		"""
+		if np is None:
+			return None
+		mm = self._mm
+		pos = offset
+		for i in range(self._header):
+			pos = self._next_line(pos)
+		end = len(mm) if end is None else end
+		if pos >= end:
+			return None
+		end = self.TABLE_LINES_PATTERN.match(mm, pos, end).end()
+		if end == pos:
+			return None
+		block = mm[pos:end].replace(b',', b'.')
+		if dash is not None and b' - ' in block:
+			# the second pass replaces the dashes which share a space with the previous ones
+			dash = b' ' + dash + b' '
+			block = block.replace(b' - ', dash).replace(b' - ', dash)
+		try:
+			records = np.loadtxt(io.BytesIO(block), dtype=list(fields), usecols=columns, comments=None, ndmin=1)
+		except ValueError:
+			return None
+		self._read_bytes += end - offset
+		return records
+
+
+class ReportStream():
+	"""Line by line engine of the text parsers of the reports.
+
+	A format is declared by (literal, pattern) pairs of the node, component (or None) and base moment
+	header lines and by the number of header lines of a table. A pattern is searched only in the lines
+	which contain its literal and must match the number as group 0.
+	"""
+	def __init__(self, node, component, base_moment, header):
+		self._node = node
+		self._component = component
+		self._base_moment = base_moment
+		self._header = header
+
+	@staticmethod
+	def _number(marker, line):
+		literal, pattern = marker
+		if literal in line:
+			result = pattern.search(line)
+			if result:
+				return int(result.group(0))
+		return None
+
+	def tables(self, lines, necessary_table, wanted=None):
+		"""Yield (nodenum, rows) for every node which necessary_table(nodenum) returns a (component, base_moment) key for.
+
+		rows yields comma-decimal fixed token lists of the table lines, the caller stops it at the first line
+		which isn't a row of the table and that line is checked for the next node header. rows is None
+		when the node block has no such table. Reading stops as soon as every node of the wanted set was yielded.
+		"""
+		remaining = None if wanted is None else set(wanted)
+		lines = iter(lines)
+		line = next(lines, None)
+		while line is not None:
+			if remaining is not None and not remaining:
+				return
+			nodenum = self._number(self._node, line)
+			line = next(lines, None)
+			if nodenum is None:
+				continue
+			key = necessary_table(nodenum)
+			if key is None:
+				continue
+			if remaining is not None:
+				remaining.discard(nodenum)
+			component, base_moment = key
+			search_component = self._component is not None
+			# the table is searched up to the next node header
+			while line is not None and self._number(self._node, line) is None:
+				if search_component:
+					search_component = self._number(self._component, line) != component
+				elif self._number(self._base_moment, line) == base_moment:
+					break
+				line = next(lines, None)
+			else:
+				yield nodenum, None
+				continue
+			for i in range(self._header + 1):
+				line = next(lines, None)
+			current = [line]
+			def rows():
+				while current[0] is not None:
+					yield current[0].replace(',', '.').split()
+					current[0] = next(lines, None)
+			yield nodenum, rows()
+			line = current[0]
+
+
+class ReportIndex(collections.UserDict):
+	"""Byte offsets of the node blocks of a report file.
+
+	{nodenum: (node_offset, {(component, base_moment): table_offset})}
+	table_offset points to the line following the base moment header.
+	The index is kept in hidden sidecar files next to the report, the rows of to_array() in .idx.npy
+	and the size and mtime of the report in .idx.json, and is rebuilt when they change.
+	The sidecars are read without pickle and need NumPy.
+	"""
+	VERSION = 2
+	def __init__(self, file):
+		super().__init__()
+		self._file = file
+		self._size = None
+		self._mtime = None
+
+	@property
+	def file(self):
+		return self._file
+
+	@staticmethod
+	def sidecar_name(file):
+		head, tail = os.path.split(file)
+		return os.path.join(head, '.{}.idx'.format(tail))
+
+	@staticmethod
+	def _stamp(file):
+		st = os.stat(file)
+		return st.st_size, st.st_mtime_ns
+
+	def is_valid(self):
+		try:
+			return (self._size, self._mtime) == self._stamp(self._file)
+		except OSError:
+			return False
+
+	def build(self, scanner):
+		self.clear()
+		self._size, self._mtime = self._stamp(self._file)
+		with scanner:
+			for nodenum, start, end in scanner.nodes():
+				self[nodenum] = (start, dict(scanner.tables(start, end)))
+		return self
+
+	def block_offset(self, nodenum, component, base_moment):
+		return self[nodenum][1].get((component, base_moment))
+
+	def split(self, n, wanted=None):
+		"""At most n indexes of runs of consecutive nodes of the file, only of the wanted nodes when given"""
+		nodenums = sorted(self if wanted is None else (i for i in wanted if i in self), key=lambda a: self[a][0])
+		parts = []
+		for i in range(n):
+			part = nodenums[len(nodenums) * i // n:len(nodenums) * (i + 1) // n]
+			if part:
+				index = type(self)(self._file)
+				index._size, index._mtime = self._size, self._mtime
+				index.data = {nodenum: self[nodenum] for nodenum in part}
+				parts.append(index)
+		return parts
+
+	def to_array(self):
+		"""int64 rows (nodenum, node_offset, component, base_moment, table_offset) of the tables in the order
+		of the file, a node without tables has a row with -1 for them and a report without components -1 for component"""
+		rows = []
+		for nodenum, (start, tables) in self.items():
+			if not tables:
+				rows.append((nodenum, start, -1, -1, -1))
+			for (component, base_moment), offset in tables.items():
+				rows.append((nodenum, start, -1 if component is None else component, base_moment, offset))
+		return np.array(rows, dtype=np.int64).reshape(-1, 5)
+
+	@classmethod
+	def from_array(cls, file, rows):
+		index = cls(file)
+		data = index.data
+		block = None
+		for nodenum, start, component, base_moment, offset in zip(*rows.T.tolist()):
+			# a repeated node replaces the tables of the previous one as in build()
+			if block != (nodenum, start):
+				block = (nodenum, start)
+				tables = {}
+				data[nodenum] = (start, tables)
+			if offset >= 0:
+				tables[(None if component < 0 else component, base_moment)] = offset
+		return index
+
+	def save(self):
+		if np is None:
+			return
+		name = self.sidecar_name(self._file)
+		rows = self.to_array()
+		stamp = {'version': self.VERSION, 'size': self._size, 'mtime': self._mtime, 'rows': len(rows)}
+		try:
+			# the stamp is written last, it doesn't match the rows of an interrupted save
+			replace_file(name + '.npy', lambda f: np.save(f, rows, allow_pickle=False))
+			replace_file(name + '.json', lambda f: f.write(json.dumps(stamp).encode('ascii')))
+		except OSError:
+			pass
+
+	@classmethod
+	def load(cls, file):
+		if np is None:
+			return None
+		name = cls.sidecar_name(file)
+		try:
+			with open(name + '.json', mode='r') as f:
+				stamp = json.load(f)
+			if not isinstance(stamp, dict) or stamp.get('version') != cls.VERSION:
+				return None
+			index = cls(file)
+			index._size, index._mtime = stamp.get('size'), stamp.get('mtime')
+			if not index.is_valid():
+				return None
+			rows = np.load(name + '.npy', allow_pickle=False)
+		except (OSError, ValueError):
+			return None
+		if rows.dtype != np.int64 or rows.shape != (stamp.get('rows'), 5):
+			return None
+		index.data = cls.from_array(file, rows).data
+		return index
+
+	@classmethod
+	def open(cls, scanner):
+		"""Index of the report of scanner, None for a compressed report which is only read as a stream
+		and without NumPy, an index which can't be saved would cost a scan more on every run"""
+		if np is None or compression(scanner.file) is not None:
+			return None
+		index = cls.load(scanner.file)
+		if index is None:
+			index = cls(scanner.file).build(scanner)
+			index.save()
+		return index
+
+
+class ReportTail():
+	"""Incremental parse of a report which is still being written.
+
+	parse(start, end) parses the node blocks with headers in the byte range.
+	Blocks followed by the header of the next node are parsed once and offset moves past them,
+	the last block is parsed again every time the file grows and its tables are replaced.
+	"""
+	def __init__(self, scanner, parse):
+		self._scanner = scanner
+		self._parse = parse
+		self._offset = 0
+		self._stamp = None
+
+	@property
+	def file(self):
+		return self._scanner.file
+
+	@property
+	def offset(self):
+		return self._offset
+
+	def update(self):
+		"""Parse the new part of the file and return the numbers of the nodes of the parsed blocks"""
+		stamp = ReportIndex._stamp(self.file)
+		if stamp == self._stamp:
+			return set()
+		if stamp[0] < self._offset:
+			raise ValueError('{} is truncated'.format(self.file))
+		self._stamp = stamp
+		with self._scanner:
+			end = self._scanner.complete_end()
+			blocks = list(self._scanner.nodes(self._offset, end))
+		if not blocks:
+			return set()
+		self._parse(self._offset, end)
+		self._offset = blocks[-1][1]
+		return {nodenum for nodenum, start, block_end in blocks}
+
+
+class ParseCache():
+	"""Directory of full parses of the reports keyed by fingerprints of the report files.
+
+	A fingerprint is size, mtime and a hash of SAMPLES blocks spread over the file.
+	An entry is a .npz of structured arrays, which is read without pickle.
+	The least recently used entries are removed when the entries take more than max_size bytes.
+	"""
+	VERSION = 2
+	SAMPLES = 16
+	SAMPLE_SIZE = 1 << 16
+	def __init__(self, directory, max_size=1 << 30):
+		if np is None:
+			raise ImportError('NumPy is required for ParseCache')
+		self._directory = directory
+		self._max_size = max_size
+		self._fingerprints = {}
+		self._read_bytes = 0
+		os.makedirs(directory, exist_ok=True)
+
+	@property
+	def directory(self):
+		return self._directory
+
+	@property
+	def read_bytes(self):
+		"""Bytes read by the cache so far, the samples of the fingerprints, the entries which were hit
+		and the BaseMoments files parsed by load_node_table()"""
+		return self._read_bytes
+
+	def fingerprint(self, file):
+		file = os.path.abspath(file)
+		if file not in self._fingerprints:
+			st = os.stat(file)
+			h = hashlib.blake2b('{} {}'.format(st.st_size, st.st_mtime_ns).encode(), digest_size=16)
+			with open(file, mode='rb') as f:
+				if st.st_size <= self.SAMPLES * self.SAMPLE_SIZE:
+					h.update(f.read())
+				else:
+					for i in range(self.SAMPLES):
+						f.seek((st.st_size - self.SAMPLE_SIZE) * i // (self.SAMPLES - 1))
+						h.update(f.read(self.SAMPLE_SIZE))
+			self._read_bytes += min(st.st_size, self.SAMPLES * self.SAMPLE_SIZE)
+			self._fingerprints[file] = h.hexdigest()
+		return self._fingerprints[file]
+
+	def key(self, kind, *files):
+		"""kind names what is parsed, files are the report and the reports it depends on"""
+		h = hashlib.blake2b('{} {}'.format(self.VERSION, kind).encode(), digest_size=16)
+		for file in files:
+			h.update(self.fingerprint(file).encode())
+		return h.hexdigest()
+
+	def _path(self, key):
+		return os.path.join(self._directory, '{}.npz'.format(key))
+
+	def get(self, key, names):
+		"""Tuple of the arrays names of the entry, None when it is missing or damaged"""
+		path = self._path(key)
+		try:
+			with np.load(path, allow_pickle=False) as entry:
+				arrays = tuple(entry[name] for name in names)
+			# mtime of the entry is its last use
+			os.utime(path)
+			self._read_bytes += os.path.getsize(path)
+		except (OSError, EOFError, ValueError, KeyError, zipfile.BadZipFile):
+			return None
+		return arrays
+
+	def put(self, key, **arrays):
+		path = self._path(key)
+		try:
+			replace_file(path, lambda f: np.savez(f, **arrays))
+		except OSError:
+			return
+		self.evict(keep=path)
+
+	def evict(self, keep=None):
+		entries = []
+		for entry in os.scandir(self._directory):
+			if entry.name.endswith('.npz') and entry.path != keep:
+				try:
+					st = entry.stat()
+				except OSError:
+					continue
+				entries.append((st.st_mtime_ns, st.st_size, entry.path))
+		size = sum(i[1] for i in entries)
+		if keep is not None and os.path.exists(keep):
+			size += os.path.getsize(keep)
+		for mtime, entry_size, path in sorted(entries):
+			if size <= self._max_size:
+				break
+			try:
+				os.remove(path)
+			except OSError:
+				continue
+			size -= entry_size
+
+	def load_node_table(self, file, backend='list'):
+		key = self.key(NodeTable.__name__, file)
+		data = self.get(key, ('nodes',))
+		if data is not None:
+			return node_table_type(backend).from_compact(data[0].tolist())
+		nt = node_table_type(backend)()
+		nt.parse_base_moments(file)
+		self._read_bytes += os.path.getsize(file)
+		self.put(key, nodes=np.array(nt.to_compact(), dtype=list(NodeArrayTable.FIELDS)).reshape(-1))
+		return nt
+
+	def load_manager_table(self, manager_table, parse, file, dependencies=(), nodes=None, records=None):
+		"""Load the tables of nodes into manager_table from the cached full parse of file.
+
+		parse(file) fills manager_table with all nodes when the cache misses,
+		records(records) may reduce the compact records of every node before they are loaded.
+		The entry keeps the records of all nodes in one array with the offsets of the nodes,
+		the tables of nodes are slices of it.
+		"""
+		key = self.key(type(manager_table).__name__, file, *dependencies)
+		data = self.get(key, ('nodes', 'offsets', 'records'))
+		if data is None or len(data[1]) != len(data[0]) + 1 or data[1][-1] != len(data[2]):
+			parse(file)
+			compact = manager_table.to_compact()
+			arrays = [manager_table.compact_array(items) for nodenum, items in compact]
+			data = (np.array([nodenum for nodenum, items in compact], dtype=np.int64),
+			        np.concatenate(((0,), np.cumsum([len(a) for a in arrays], dtype=np.int64))),
+			        np.concatenate(arrays) if arrays else manager_table.compact_array([]))
+			self.put(key, nodes=data[0], offsets=data[1], records=data[2])
+			manager_table.clear()
+		nodenums, offsets, all_records = data
+		data = [(nodenum, all_records[start:end]) for nodenum, start, end in zip(nodenums.tolist(), offsets[:-1].tolist(), offsets[1:].tolist()) if nodes is None or nodenum in nodes]
+		if records is not None:
+			data = [(nodenum, records(items)) for nodenum, items in data]
+		manager_table.load_compact(data)
+		if records is None:
+			bounds = np.column_stack((offsets[:-1], offsets[1:]))
+			manager_table.set_table_offsets(bounds if nodes is None else bounds[np.isin(nodenums, list(nodes))])
+
+
+class ModelStore():
+	"""Directory of .npy column files of a parsed model, the files are opened with np.load(mmap_mode='r').
+
+	nodes.npy is the node table. The tables of all nodes are stored one after another in
+	local_num.npy, local_temp.npy, local_stress.npy (Nx3), elastic.npy and cycles.npy,
+	*_offsets.npy are (nodenum, start, end) rows of the tables. Tables of the array backend
+	opened from the store are views of the mapping, processes opening one store share its pages.
+	"""
+	VERSION = 1
+	MANIFEST = 'store.json'
+	def __init__(self, directory):
+		if np is None:
+			raise ImportError('NumPy is required for ModelStore')
+		self._directory = directory
+		try:
+			with open(os.path.join(directory, self.MANIFEST), mode='r') as f:
+				manifest = json.load(f)
+		except (OSError, ValueError):
+			raise ValueError('{} is not a model store'.format(directory))
+		if manifest.get('version') != self.VERSION:
+			raise ValueError('{} is a model store of another version'.format(directory))
+		self._columns = {}
+		self._offsets = {}
+		for name in ('local', 'elastic', 'cycles'):
+			self._offsets[name] = {nodenum: (start, end) for nodenum, start, end in self._load('{}_offsets'.format(name)).tolist()}
+
+	@property
+	def directory(self):
+		return self._directory
+
+	def _load(self, name):
+		if name not in self._columns:
+			self._columns[name] = np.load(os.path.join(self._directory, '{}.npy'.format(name)), mmap_mode='r')
+		return self._columns[name]
+
+	@classmethod
+	def _save_tables(cls, directory, name, tables, **columns):
+		"""tables are (nodenum, length) in the order of the rows of the column arrays"""
+		offsets = np.zeros((len(tables), 3), dtype=np.int64)
+		start = 0
+		for i, (nodenum, length) in enumerate(tables):
+			offsets[i] = nodenum, start, start + length
+			start += length
+		np.save(os.path.join(directory, '{}_offsets.npy'.format(name)), offsets)
+		for column, data in columns.items():
+			np.save(os.path.join(directory, '{}.npy'.format(column)), data)
+
+	@classmethod
+	def compile(cls, directory, node_table, local_reduced_stress_manager_table, elastic_reduced_stress_manager_table, cycle_type_manager_table):
+		"""Write the tables into directory and open the store"""
+		if np is None:
+			raise ImportError('NumPy is required for ModelStore')
+		os.makedirs(directory, exist_ok=True)
+		manifest = os.path.join(directory, cls.MANIFEST)
+		if os.path.exists(manifest):
+			os.remove(manifest)
+		np.save(os.path.join(directory, 'nodes.npy'), np.array(node_table.to_compact(), dtype=list(NodeArrayTable.FIELDS)))
+		tables = []
+		for nodenum, records in local_reduced_stress_manager_table.to_compact():
+			table = LocalReducedStressArrayTable(nodenum, None)
+			table.extend_values(records)
+			tables.append(table)
+		cls._save_tables(directory, 'local', [(i.nodenum, len(i)) for i in tables],
+		                 local_num=np.concatenate([i.column('num') for i in tables] or [np.empty(0, dtype=np.int64)]),
+		                 local_temp=np.concatenate([i.column('temp') for i in tables] or [np.empty(0)]),
+		                 local_stress=np.concatenate([i.stress for i in tables] or [np.empty((0, 3))]))
+		for name, table_type, manager_table in (('elastic', ElasticReducedStressArrayTable, elastic_reduced_stress_manager_table),
+		                                        ('cycles', CycleTypeArrayTable, cycle_type_manager_table)):
+			tables = []
+			for nodenum, records in manager_table.to_compact():
+				table = table_type(nodenum, None)
+				table.extend_values(records)
+				tables.append(table)
+			cls._save_tables(directory, name, [(i.nodenum, len(i)) for i in tables],
+			                 **{name: np.concatenate([i.data for i in tables] or [np.empty(0, dtype=list(table_type.FIELDS))])})
+		# the manifest is written last, a store without it is incomplete
+		with open(manifest, mode='w') as f:
+			json.dump({'version': cls.VERSION}, f)
+		return cls(directory)
+
+	def node_table(self, backend='list'):
+		if backend == 'array':
+			return NodeArrayTable(self._load('nodes'))
+		return NodeTable.from_compact(self._load('nodes').tolist())
+
+	def cycle_damage(self):
+		"""(nodes, a, offsets) of all cycle types for DamageAnalytics, a is the damage column of the mapping"""
+		offsets = self._load('cycles_offsets')
+		return offsets[:, 0], self._load('cycles')['a'], np.append(offsets[:, 1], offsets[-1, 2] if len(offsets) else 0)
+
+	def _tables(self, name, nodes):
+		for nodenum, (start, end) in self._offsets[name].items():
+			if nodes is None or nodenum in nodes:
+				yield nodenum, start, end
+
+	def _table_offsets(self, name, nodes):
+		"""(start, end) rows of the tables of nodes"""
+		offsets = self._load('{}_offsets'.format(name))
+		if nodes is not None:
+			offsets = offsets[np.isin(offsets[:, 0], list(nodes))]
+		return offsets[:, 1:]
+
+	def manager_tables(self, node_table, nodes=None, limit=None, max_rows=None, backend='array'):
+		"""Array backend manager tables of nodes backed by the mapped columns
+
+		limit and max_rows are applied to the cycle types as CycleTypeRows does.
+		With backend='list' the tables are copied into list backend manager tables.
+		"""
+		lmt = LocalReducedStressManagerTable(node_table, 'array')
+		num, temp, stress = self._load('local_num'), self._load('local_temp'), self._load('local_stress')
+		for nodenum, start, end in self._tables('local', nodes):
+			LocalReducedStressArrayTable(nodenum, lmt).set_columns(num[start:end], temp[start:end], stress[start:end])
+		lmt.set_table_offsets(self._table_offsets('local', nodes))
+		emt = ElasticReducedStressManagerTable(node_table, lmt, 'array')
+		data = self._load('elastic')
+		for nodenum, start, end in self._tables('elastic', nodes):
+			ElasticReducedStressArrayTable(nodenum, emt, data[start:end])
+		emt.set_table_offsets(self._table_offsets('elastic', nodes))
+		ctt = CycleTypeManagerTable(node_table, lmt, emt, 'array')
+		data = self._load('cycles')
+		for nodenum, start, end in self._tables('cycles', nodes):
+			CycleTypeArrayTable(nodenum, ctt, CycleTypeManagerTable.bound_records(data[start:end], limit, max_rows))
+		if backend != 'array':
+			lmt, emt, ctt = self._copy(node_table, backend, lmt, emt, ctt)
+		return lmt, emt, ctt
+
+	@staticmethod
+	def _copy(node_table, backend, *manager_tables):
+		lmt = LocalReducedStressManagerTable(node_table, backend)
+		emt = ElasticReducedStressManagerTable(node_table, lmt, backend)
+		ctt = CycleTypeManagerTable(node_table, lmt, emt, backend)
+		for copy, manager_table in zip((lmt, emt, ctt), manager_tables):
+			copy.load_compact([(nodenum, table.as_tuples()) for nodenum, table in manager_table.items()])
+		return lmt, emt, ctt
+
+
+class SQLiteStore():
+	"""SQLite database of a parsed model for cross-node queries.
+
+	nodes, local, elastic and cycles tables keep the rows of the node table and of the manager tables
+	in the order of the reports, a missing ksi, lb or lh is NULL. position of a cycle type is its place
+	in the table of the node sorted by damage, the worst one is 0. real_fid and real_sid are the moments
+	of the cycle type after history expansion as cycle_type_rows() shows them, fid and sid as they are
+	in the report. report_nodes lists the tables of every report including the empty ones.
+	"""
+	VERSION = 2
+	NODE_COLUMNS = ('num', 'damage', 'base_moment', 'component')
+	LOCAL_COLUMNS = ('node', 'num', 'temp', 'si', 'sj', 'sk')
+	ELASTIC_COLUMNS = ('node', 'num', 'temp', 'rpe', 'nu', 'ksi', 'lb', 'lh', 'sll', 'sfl')
+	CYCLE_COLUMNS = ('node', 'position', 'fid', 'sid', 'saf', 'sfmax', 'sfmin', 'tmax', 'tmin', 'r', 'ndop', 'n', 'a', 'real_fid', 'real_sid')
+	SCHEMA = (
+		'CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)',
+		'CREATE TABLE nodes (num INTEGER, damage REAL, base_moment INTEGER, component INTEGER)',
+		'CREATE TABLE report_nodes (report TEXT, node INTEGER)',
+		'CREATE TABLE local (node INTEGER, num INTEGER, temp REAL, si REAL, sj REAL, sk REAL)',
+		'CREATE TABLE elastic (node INTEGER, num INTEGER, temp REAL, rpe REAL, nu REAL, ksi INTEGER, lb INTEGER, lh INTEGER, sll REAL, sfl REAL)',
+		'CREATE TABLE cycles (node INTEGER, position INTEGER, fid INTEGER, sid INTEGER, saf REAL, sfmax REAL, sfmin REAL, tmax REAL, tmin REAL, r REAL, ndop REAL, n REAL, a REAL, real_fid INTEGER, real_sid INTEGER)',
+	)
+	# the indexes are made after the rows are inserted
+	INDEXES = (
+		'CREATE UNIQUE INDEX nodes_num ON nodes (num)',
+		'CREATE INDEX nodes_damage ON nodes (damage)',
+		'CREATE INDEX nodes_component ON nodes (component, damage)',
+		'CREATE INDEX report_nodes_node ON report_nodes (report, node)',
+		'CREATE INDEX local_node ON local (node)',
+		'CREATE INDEX elastic_node ON elastic (node)',
+		'CREATE INDEX cycles_node ON cycles (node, position)',
+		'CREATE INDEX cycles_saf ON cycles (saf)',
+		'CREATE INDEX cycles_a ON cycles (a)',
+		'CREATE INDEX cycles_real_fid ON cycles (real_fid, position)',
+		'CREATE INDEX cycles_real_sid ON cycles (real_sid, position)',
+	)
+	def __init__(self, file):
+		if not os.path.exists(file):
+			raise ValueError('{} is not a model database'.format(file))
+		self._file = file
+		self._connection = sqlite3.connect('{}?mode=ro'.format(pathlib.Path(file).resolve().as_uri()), uri=True)
+		try:
+			version = self._connection.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+		except sqlite3.DatabaseError:
+			version = None
+		if version is None or version[0] != str(self.VERSION):
+			self._connection.close()
+			raise ValueError('{} is not a model database of version {}'.format(file, self.VERSION))
+
+	@property
+	def file(self):
+		return self._file
+
+	def close(self):
+		self._connection.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		self.close()
+
+	@staticmethod
+	def _rows(manager_table):
+		for nodenum, table in manager_table.items():
+			for values in table.as_tuples():
+				yield (nodenum, *values)
+
+	@staticmethod
+	def _cycle_rows(manager_table):
+		"""Rows of CYCLE_COLUMNS, the real ids are found as in cycle_type_rows()"""
+		mlen = manager_table.local_reduced_stress_manager_table.length_of_tables
+		elastic = manager_table.elastic_reduced_stress_manager_table
+		for nodenum, table in manager_table.items():
+			for i, values in enumerate(table.as_tuples()):
+				fid, sid, saf, sfmax, sfmin = values[:5]
+				if fid > mlen or sid > mlen:
+					elastic_table = elastic.get(nodenum)
+					if elastic_table is None:
+						real_fid = real_sid = None
+					else:
+						real_fid, real_sid = elastic_table.search_real_id(sfmax), elastic_table.search_real_id(sfmin)
+				else:
+					real_fid, real_sid = fid, sid
+				yield (nodenum, i, *values, real_fid, real_sid)
+
+	@classmethod
+	def compile(cls, file, node_table, local_reduced_stress_manager_table, elastic_reduced_stress_manager_table, cycle_type_manager_table):
+		"""Write the tables into a new database file and open it.
+
+		The rows are inserted with executemany() in one transaction into a temporary file which replaces file at the end.
+		"""
+		temp = '{}.tmp'.format(file)
+		if os.path.exists(temp):
+			os.remove(temp)
+		connection = sqlite3.connect(temp)
+		try:
+			# the temporary file is thrown away on a failure, so the journal is not needed
+			connection.execute('PRAGMA journal_mode = OFF')
+			connection.execute('PRAGMA synchronous = OFF')
+			insert = lambda table, columns, rows: connection.executemany('INSERT INTO {} VALUES ({})'.format(table, ', '.join('?' * len(columns))), rows)
+			with connection:
+				for statement in cls.SCHEMA:
+					connection.execute(statement)
+				insert('nodes', cls.NODE_COLUMNS, node_table.to_compact())
+				for report, manager_table in (('local', local_reduced_stress_manager_table), ('elastic', elastic_reduced_stress_manager_table), ('cycles', cycle_type_manager_table)):
+					insert('report_nodes', ('report', 'node'), ((report, nodenum) for nodenum in manager_table))
+				insert('local', cls.LOCAL_COLUMNS, cls._rows(local_reduced_stress_manager_table))
+				insert('elastic', cls.ELASTIC_COLUMNS, cls._rows(elastic_reduced_stress_manager_table))
+				insert('cycles', cls.CYCLE_COLUMNS, cls._cycle_rows(cycle_type_manager_table))
+				for statement in cls.INDEXES:
+					connection.execute(statement)
+				connection.execute("INSERT INTO meta VALUES ('version', ?)", (str(cls.VERSION),))
+			connection.execute('ANALYZE')
+		except BaseException:
+			connection.close()
+			os.remove(temp)
+			raise
+		connection.close()
+		os.replace(temp, file)
+		return cls(file)
+
+	def execute(self, sql, parameters=()):
+		"""Cursor of any read only statement"""
+		return self._connection.execute(sql, parameters)
+
+	def nodes(self, damage_above=None, component=None, moment=None, limit=None):
+		"""Rows of NODE_COLUMNS sorted by damage
+
+		moment selects the nodes whose worst cycle type has it as the first or the second real moment.
+		"""
+		where, parameters = [], []
+		if damage_above is not None:
+			where.append('damage > ?')
+			parameters.append(damage_above)
+		if component is not None:
+			where.append('component = ?')
+			parameters.append(component)
+		if moment is not None:
+			where.append('num IN (SELECT node FROM cycles WHERE real_fid = ? AND position = 0 UNION SELECT node FROM cycles WHERE real_sid = ? AND position = 0)')
+			parameters.extend((moment, moment))
+		return self._select('nodes', self.NODE_COLUMNS, where, parameters, 'damage DESC', limit)
+
+	def cycle_types(self, saf_above=None, damage_above=None, component=None, moment=None, nodes=None, limit=None):
+		"""Rows of CYCLE_COLUMNS sorted by damage
+
+		component selects the cycle types of the nodes where the component governs,
+		moment selects the cycle types with it as the first or the second real moment.
+		"""
+		where, parameters = [], []
+		if saf_above is not None:
+			where.append('saf > ?')
+			parameters.append(saf_above)
+		if damage_above is not None:
+			where.append('a > ?')
+			parameters.append(damage_above)
+		if component is not None:
+			where.append('node IN (SELECT num FROM nodes WHERE component = ?)')
+			parameters.append(component)
+		if moment is not None:
+			where.append('(real_fid = ? OR real_sid = ?)')
+			parameters.extend((moment, moment))
+		if nodes is not None:
+			where.append(self.NODES_IN)
+			parameters.append(self._json_nodes(nodes))
+		return self._select('cycles', self.CYCLE_COLUMNS, where, parameters, 'a DESC', limit)
+
+	def _select(self, table, columns, where, parameters, order, limit):
+		sql = 'SELECT {} FROM {}'.format(', '.join(columns), table)
+		if where:
+			sql += ' WHERE ' + ' AND '.join(where)
+		sql += ' ORDER BY ' + order
+		if limit is not None:
+			sql += ' LIMIT ?'
+			parameters = parameters + [limit]
+		return self._connection.execute(sql, parameters).fetchall()
+
+	def node_table(self, backend='list'):
+		rows = self._connection.execute('SELECT {} FROM nodes ORDER BY rowid'.format(', '.join(self.NODE_COLUMNS))).fetchall()
+		return node_table_type(backend).from_compact(rows)
+
+	# any number of nodes is one parameter
+	NODES_IN = 'node IN (SELECT value FROM json_each(?))'
+
+	@staticmethod
+	def _json_nodes(nodes):
+		return json.dumps([int(a) for a in nodes])
+
+	def _tables(self, report, columns, nodes):
+		"""(nodenum, rows) of the tables of report in the order of the file, rows are without the node column"""
+		where, parameters = '', ()
+		if nodes is not None:
+			where, parameters = ' AND ' + self.NODES_IN, (self._json_nodes(nodes),)
+		order = self._connection.execute('SELECT node FROM report_nodes WHERE report = ?' + where + ' ORDER BY rowid', (report, *parameters))
+		cursor = self._connection.execute('SELECT {} FROM {} WHERE 1'.format(', '.join(columns), report) + where + ' ORDER BY rowid', parameters)
+		# the rows were inserted in the order of report_nodes, empty tables have no rows
+		groups = itertools.groupby(cursor, key=lambda a: a[0])
+		group = next(groups, None)
+		for nodenum, in order:
+			if group is not None and group[0] == nodenum:
+				yield nodenum, [a[1:] for a in group[1]]
+				group = next(groups, None)
+			else:
+				yield nodenum, []
+
+	def manager_tables(self, node_table, nodes=None, limit=None, max_rows=None, backend='list'):
+		"""Manager tables of nodes read from the database
+
+		limit and max_rows are applied to the cycle types as CycleTypeRows does.
+		"""
+		lmt = LocalReducedStressManagerTable(node_table, backend)
+		lmt.load_compact(self._tables('local', self.LOCAL_COLUMNS, nodes))
+		emt = ElasticReducedStressManagerTable(node_table, lmt, backend)
+		emt.load_compact(self._tables('elastic', self.ELASTIC_COLUMNS, nodes))
+		ctt = CycleTypeManagerTable(node_table, lmt, emt, backend)
+		# the rows are without position and the real ids
+		ctt.load_compact((nodenum, CycleTypeManagerTable.bound_records([a[1:] for a in rows], limit, max_rows)) for nodenum, rows in self._tables('cycles', self.CYCLE_COLUMNS[:-2], nodes))
+		return lmt, emt, ctt
+
+
+class ReportManagerTable(collections.UserDict):
+	"""Tables of the nodes of a report, a subclass declares the format of its report.
+
+	SCAN_NODE_*_PATTERN locate the node, component and base moment headers for ReportScanner and
+	FIND_NODE_*_PATTERN with FIND_NODE_LITERALS for ReportStream, a report without component headers
+	has None for them. HEADER_LINES lines precede the rows of a table. TABLE_TYPES are the table
+	classes of the backends. COLUMNS are the (token index, read function) pairs of the fields
+	of the array table, _read_record() reads a row by them and _read_block() the whole table at once.
+	"""
+	TABLE_TYPES = {}
+	HEADER_LINES = 2
+	COLUMNS = ()
+	FIND_NODE_LITERALS = ('Calculation', 'Component', 'Base')
+	FIND_NODE_NUM_PATTERN = None
+	FIND_NODE_COMPONENT_PATTERN = None
+	FIND_NODE_BASEMOMENT_PATTERN = None
+	SCAN_NODE_NUM_PATTERN = None
+	SCAN_NODE_COMPONENT_PATTERN = None
+	SCAN_NODE_BASEMOMENT_PATTERN = None
+
+	def __init__(self, node_table, backend='list'):
+		super().__init__()
+		if backend not in self.TABLE_TYPES:
+			raise ValueError(backend)
+		if backend == 'array' and np is None:
+			raise ImportError('NumPy is required for the array backend')
+		self._table_type = self.TABLE_TYPES[backend]
+		self._backend = backend
+		self._read_bytes = 0
+		self._length_of_tables = None
+		if node_table is None:
+			self._node_table = None
+		elif isinstance(node_table, (NodeTable, NodeArrayTable)):
+			self._node_table=weakref.ref(node_table)
+		else:
+			raise ValueError
+
+	@property
+	def backend(self):
+		return self._backend
+
+	@property
+	def read_bytes(self):
+		"""Bytes of the reports consumed by the parsers of the table, decompressed for a compressed report"""
+		return self._read_bytes
+
+	@property
+	def node_table(self):
+		if self._node_table is None:
+			return None
+		else:
+			return self._node_table()
+
+	@classmethod
+	def scanner(cls, file):
+		return ReportScanner(file, cls.SCAN_NODE_NUM_PATTERN, cls.SCAN_NODE_COMPONENT_PATTERN, cls.SCAN_NODE_BASEMOMENT_PATTERN, cls.HEADER_LINES)
+
+	@classmethod
+	def stream(cls):
+		patterns = (cls.FIND_NODE_NUM_PATTERN, cls.FIND_NODE_COMPONENT_PATTERN, cls.FIND_NODE_BASEMOMENT_PATTERN)
+		return ReportStream(*[None if pattern is None else (literal, pattern) for literal, pattern in zip(cls.FIND_NODE_LITERALS, patterns)], cls.HEADER_LINES)
+
+	@classmethod
+	def open_index(cls, file):
+		return ReportIndex.open(cls.scanner(file))
+
+	def to_compact(self):
+		"""Picklable [(nodenum, records), ...] without links to the other tables
+
+		records are a structured array for the array backend or a list of record field tuples.
+		"""
+		if self._backend == 'array':
+			return [(nodenum, table.as_array()) for nodenum, table in self.items()]
+		return [(nodenum, table.as_tuples()) for nodenum, table in self.items()]
+
+	def load_compact(self, data, read_bytes=0):
+		"""Load to_compact() data, read_bytes of the parse of data (e.g. by a worker) are added to read_bytes"""
+		self._length_of_tables = None
+		for nodenum, records in data:
+			self._table_type(nodenum, self).extend_values(records)
+		self._read_bytes += read_bytes
+
+	def set_table_offsets(self, offsets):
+		"""(start, end) rows of the tables when they are slices of one array, length_of_tables is taken from them"""
+		self._length_of_tables = int(np.diff(offsets).max()) if len(offsets) else 0
+
+	@property
+	def length_of_tables(self):
+		if self._length_of_tables is None:
+			return max(map(len, self.values()), default=0)
+		return self._length_of_tables
+
+	@classmethod
+	def compact_array(cls, records):
+		"""Structured array of the array table of records of to_compact() of either backend"""
+		if isinstance(records, np.ndarray):
+			return records
+		table = cls.TABLE_TYPES['array'](None, None)
+		table.extend_values(records)
+		return table.as_array()
+
+	def _wanted_nodes(self, nodes):
+		return None if nodes is None else set(filter(self.node_table.__contains__, nodes))
+
+	def _necessary_table(self, nodenum, nodes):
+		if (nodes is not None and nodenum not in nodes) or not self.node_table.get(nodenum):
+			return None
+		node = self.node_table[nodenum]
+		return (None if self.SCAN_NODE_COMPONENT_PATTERN is None else node.component), node.base_moment
+
+	@classmethod
+	def _read_record(cls, current_table, temp_list):
+		current_table.append_values(tuple([read(temp_list[i]) for i, read in cls.COLUMNS]))
+
+	@classmethod
+	def _block_records(cls, scanner, offset, end=None):
+		return scanner.table_records(offset, cls.TABLE_TYPES['array'].FIELDS, tuple(i for i, read in cls.COLUMNS), end=end)
+
+	@classmethod
+	def _read_block(cls, scanner, current_table, offset, end=None):
+		"""_read_record() for the whole table at once, False when it has to be read by rows"""
+		records = cls._block_records(scanner, offset, end)
+		if records is None:
+			return False
+		current_table.extend_values(records)
+		return True
+
+	def _table_rows(self):
+		"""Collector of the rows which moves them to the table after the last one, None to read into the table"""
+		return None
+
+	def _add_table(self, nodenum, rows, collector, read_block=None, verbose=False):
+		"""Create the table of nodenum and read rows into it, rows is None when the node has no such table"""
+		if verbose:
+			print('Find node header = {}'.format(nodenum))
+		current_table = self._table_type(nodenum, self)
+		if rows is not None:
+			if verbose:
+				print('Find necessary_base_moment = {}'.format(self.node_table[nodenum].base_moment))
+			target = current_table if collector is None else collector
+			if read_block is None or not read_block(target):
+				for temp_list in rows:
+					try:
+						self._read_record(target, temp_list)
+					except (ValueError, IndexError):
+						break
+		if collector is not None:
+			collector.move_to(current_table)
+
+	def _parse_scanned(self, file, nodes, index, start=0, end=None, verbose=False, **options):
+		"""Parse the node blocks in the byte range [start, end) of the mapped report, options go to _table_rows()"""
+		self._length_of_tables = None
+		wanted = self._wanted_nodes(nodes)
+		collector = self._table_rows(**options)
+		with self.scanner(file) as scanner:
+			for nodenum, offset in scanner.node_tables(lambda a: self._necessary_table(a, nodes), index, start, end, wanted):
+				if offset is None:
+					self._add_table(nodenum, None, collector, verbose=verbose)
+				else:
+					self._add_table(nodenum, scanner.rows(offset, end), collector, lambda target: self._read_block(scanner, target, offset, end), verbose)
+		self._read_bytes += scanner.read_bytes
+
+	def _parse_file(self, file, nodes, index, engine, verbose=False, **options):
+		"""engine='text' reads the lines with ReportStream, it doesn't use index. Compressed reports are always read so"""
+		if engine == 'mmap' and compression(file) is None:
+			return self._parse_scanned(file, nodes, index, verbose=verbose, **options)
+		self._length_of_tables = None
+		wanted = self._wanted_nodes(nodes)
+		collector = self._table_rows(**options)
+		with open_report(file) as f:
+			for nodenum, rows in self.stream().tables(f, lambda a: self._necessary_table(a, nodes), wanted):
+				self._add_table(nodenum, rows, collector, verbose=verbose)
+			# the position of the binary stream, up to a chunk read ahead by the text stream
+			self._read_bytes += f.buffer.tell()
+
+
 class CycleTypeRecord(ChildMixin):
 	__slots__ = ['_first_id', '_second_id', '_saf', '_sfmax', '_sfmin', '_tmax', '_tmin', '_r', '_ndop', '_n', '_a', '_parent']
 	def __init__(self, parent, first_id, second_id, saf ,sfmax, sfmin, tmax, tmin, r, ndop, n, a):
@@ -135,55 +1393,263 @@ class CycleTypeTable(collections.UserList, ChildMixin):
 	def nodenum(self):
 		return self._nodenum
 	
+	def append_values(self, values):
+		CycleTypeRecord(self, *values)
+	
+	def extend_values(self, rows):
+		if np is not None and isinstance(rows, np.ndarray):
+			rows = rows.tolist()
+		for values in rows:
+			CycleTypeRecord(self, *values)
+	
+	def as_tuples(self):
+		return [(i.first_id, i.second_id, i.saf, i.sfmax, i.sfmin, i.tmax, i.tmin, i.r, i.ndop, i.n, i.a) for i in self]
+	
+	def sort_by_damage(self):
+		self.sort(key = lambda a: a.a, reverse=True)
+	
+	def above(self, limit):
+		return filter(lambda a: a.a > limit, self)
+	
 	def print_table(self, limit=1E-8):
 		print(self.OUTPUT_HEADER)
 		for i in self:
 			if i.a >= limit:
 				print(self.OUTPUT_FORMAT.format(fid=i.first_id, sid=i.second_id, saf=i.saf, n=i.n, a=i.a, sfmax=i.sfmax, sfmin=i.sfmin, tmin=i.tmin, tmax=i.tmax, r=i.r, ndop=i.ndop))
 
-class CycleTypeManagerTable(collections.UserDict):
-	class AccumulatedFatigueDamageFileLineContext(enum.Enum):
-		SEARCH_NODE_NUM = 0
-		SEARCH_NUM_COMPONENT_NUM = 1
-		SEARCH_NODE_BM = 2
-		READ_RECORD = 3
-		
-	def __init__(self, node_table, local_reduced_stress_manager_table, elastic_reduced_stress_manager_table):
-		super().__init__()
-		if node_table is None:
-			self._node_table = None
-		elif isinstance(node_table, NodeTable):
-			self._node_table=weakref.ref(node_table)
-		else:
-			raise ValueError
+
+class CycleTypeRecordView():
+	"""CycleTypeRecord interface over a row of CycleTypeArrayTable, the row is shared with the table array"""
+	__slots__ = ['_row', '_parent']
+	def __init__(self, parent, row):
+		self._parent = parent
+		self._row = row
 	
-		if local_reduced_stress_manager_table is None:
-			self._local_reduced_stress_manager_table = None
-		elif isinstance(local_reduced_stress_manager_table, LocalReducedStressManagerTable):
-			self._local_reduced_stress_manager_table=weakref.ref(local_reduced_stress_manager_table)
-		else:
-			raise ValueError
-		
-		if elastic_reduced_stress_manager_table is None:
-			self._elastic_reduced_stress_manager_table = None
-		elif isinstance(elastic_reduced_stress_manager_table, ElasticReducedStressManagerTable):
-			self._elastic_reduced_stress_manager_table=weakref.ref(elastic_reduced_stress_manager_table)
-		else:
-			raise ValueError
-		
 	@property
-	def elastic_reduced_stress_manager_table(self):
-		if self._elastic_reduced_stress_manager_table is None:
-			return None
-		else:
-			return self._elastic_reduced_stress_manager_table()
-			
+	def parent(self):
+		return self._parent
+	
 	@property
-	def node_table(self):
-		if self._node_table is None:
-			return None
-		else:
-			return self._node_table()
+	def first_id(self):
+		return int(self._row['fid'])
+	
+	@first_id.setter
+	def first_id(self, value):
+		self._row['fid'] = value
+	
+	@property
+	def second_id(self):
+		return int(self._row['sid'])
+	
+	@second_id.setter
+	def second_id(self, value):
+		self._row['sid'] = value
+	
+	@property
+	def saf(self):
+		return float(self._row['saf'])
+	
+	@property
+	def sfmax(self):
+		return float(self._row['sfmax'])
+	
+	@property
+	def sfmin(self):
+		return float(self._row['sfmin'])
+	
+	@property
+	def tmax(self):
+		return float(self._row['tmax'])
+	
+	@property
+	def tmin(self):
+		return float(self._row['tmin'])
+	
+	@property
+	def r(self):
+		return float(self._row['r'])
+	
+	@property
+	def ndop(self):
+		return float(self._row['ndop'])
+	
+	@property
+	def n(self):
+		return float(self._row['n'])
+	
+	@property
+	def a(self):
+		return float(self._row['a'])
+
+
+class CycleTypeArrayTable(ChildMixin):
+	"""CycleTypeTable stored in a NumPy structured array.
+
+	Rows are appended to a list and moved into the array on the first access of data.
+	Items are CycleTypeRecordView objects, they stay valid until the table is sorted or extended.
+	"""
+	FIELDS = (('fid', 'i8'), ('sid', 'i8'), ('saf', 'f8'), ('sfmax', 'f8'), ('sfmin', 'f8'), ('tmax', 'f8'), ('tmin', 'f8'), ('r', 'f8'), ('ndop', 'f8'), ('n', 'f8'), ('a', 'f8'))
+	OUTPUT_HEADER = CycleTypeTable.OUTPUT_HEADER
+	OUTPUT_FORMAT = CycleTypeTable.OUTPUT_FORMAT
+	def __init__(self, nodenum, parent=None, data=None):
+		if np is None:
+			raise ImportError('NumPy is required for CycleTypeArrayTable')
+		self._nodenum = nodenum
+		self._dtype = np.dtype(list(self.FIELDS))
+		self._data = np.empty(0, dtype=self._dtype) if data is None else data
+		self._pending = []
+		super().__init__(parent, CycleTypeManagerTable, nodenum)
+	
+	@property
+	def nodenum(self):
+		return self._nodenum
+	
+	@property
+	def data(self):
+		if self._pending:
+			self._data = np.concatenate((self._data, np.array(self._pending, dtype=self._dtype)))
+			self._pending = []
+		return self._data
+	
+	def append_values(self, values):
+		self._pending.append(values)
+	
+	def extend_values(self, rows):
+		if isinstance(rows, np.ndarray):
+			self._data = np.concatenate((self.data, rows.astype(self._dtype, copy=False)))
+		else:
+			self._pending.extend(rows)
+	
+	def as_array(self):
+		return self.data
+	
+	def as_tuples(self):
+		return self.data.tolist()
+	
+	def __len__(self):
+		return len(self._data) + len(self._pending)
+	
+	def __getitem__(self, i):
+		return CycleTypeRecordView(self, self.data[i])
+	
+	def __iter__(self):
+		data = self.data
+		for i in range(len(data)):
+			yield CycleTypeRecordView(self, data[i])
+	
+	def sort_by_damage(self):
+		data = self.data
+		# stable as list.sort(key=lambda a: a.a, reverse=True)
+		self._data = data[np.argsort(-data['a'], kind='stable')]
+	
+	def above(self, limit):
+		data = self.data
+		data = data[data['a'] > limit]
+		for i in range(len(data)):
+			yield CycleTypeRecordView(self, data[i])
+	
+	def print_table(self, limit=1E-8):
+		print(self.OUTPUT_HEADER)
+		data = self.data
+		for fid, sid, saf, sfmax, sfmin, tmax, tmin, r, ndop, n, a in data[data['a'] >= limit].tolist():
+			print(self.OUTPUT_FORMAT.format(fid=fid, sid=sid, saf=saf, n=n, a=a, sfmax=sfmax, sfmin=sfmin, tmin=tmin, tmax=tmax, r=r, ndop=ndop))
+
+
+class CycleTypeRows():
+	"""Rows of a cycle type table collected by a parser.
+
+	Rows with damage a <= limit are rejected before the other columns are converted.
+	With max_rows only that many rows with the largest damage are kept in a bounded heap.
+	"""
+	def __init__(self, limit=None, max_rows=None):
+		self._limit = limit
+		self._max_rows = max_rows
+		self._rows = []
+		self._blocks = []
+		self._count = 0
+		# the damage a is the last column
+		self._columns = CycleTypeManagerTable.COLUMNS[:-1]
+		self._a_column = CycleTypeManagerTable.COLUMNS[-1][0]
+	
+	def add(self, temp_list):
+		"""Add the tokens of a table line read by CycleTypeManagerTable.COLUMNS"""
+		a = float(temp_list[self._a_column])
+		if self._limit is not None and a <= self._limit:
+			return
+		values = tuple([read(temp_list[i]) for i, read in self._columns]) + (a,)
+		if self._max_rows is None:
+			self._rows.append(values)
+		else:
+			self._count += 1
+			self._push(a, self._count, values)
+	
+	def _push(self, a, count, values):
+		# equal damages keep the file order as the stable sort of the whole table does
+		if len(self._rows) < self._max_rows:
+			heapq.heappush(self._rows, (a, -count, values))
+		else:
+			heapq.heappushpop(self._rows, (a, -count, values))
+	
+	def extend_values(self, records):
+		"""add() for a structured array of ReportScanner.table_records() with CycleTypeArrayTable.FIELDS"""
+		if self._limit is not None:
+			records = records[records['a'] > self._limit]
+		if self._max_rows is None:
+			self._blocks.append(records)
+		else:
+			order = np.argsort(-records['a'], kind='stable')[:self._max_rows]
+			for i, values in zip(order.tolist(), records[order].tolist()):
+				self._push(values[-1], self._count + i + 1, values)
+			self._count += len(records)
+	
+	def move_to(self, table):
+		"""Append the rows to table sorted by damage"""
+		if self._max_rows is None:
+			for records in self._blocks:
+				table.extend_values(records)
+			table.extend_values(self._rows)
+			table.sort_by_damage()
+		else:
+			table.extend_values([values for a, count, values in sorted(self._rows, reverse=True)])
+		self._rows = []
+		self._blocks = []
+		self._count = 0
+
+
+class CycleTypeManagerTable(ReportManagerTable):
+	TABLE_TYPES = {'list': CycleTypeTable, 'array': CycleTypeArrayTable}
+	FIND_NODE_NUM_PATTERN = re.compile(r'(?<=\>\sCalculation\snode:\s)\d+')
+	FIND_NODE_COMPONENT_PATTERN = re.compile(r'(?<=\>\sComponent\snumber:\s)\d+')
+	FIND_NODE_BASEMOMENT_PATTERN = re.compile(r'(?<=\>\sBase\scalculated\smoment\sof\stime\s)\d+')
+
+	SCAN_NODE_NUM_PATTERN = scan_pattern(r'> Calculation node: (\d+)')
+	SCAN_NODE_COMPONENT_PATTERN = scan_pattern(r'> Component number: (\d+)')
+	SCAN_NODE_BASEMOMENT_PATTERN = scan_pattern(r'> Base calculated moment of time (\d+)')
+	COLUMNS = ((0, int), (2, int), (7, float), (5, float), (6, float), (9, float), (8, float), (10, float), (19, float), (20, float), (21, float))
+
+	def __init__(self, node_table, local_reduced_stress_manager_table, elastic_reduced_stress_manager_table, backend='list'):
+		"""backend='array' keeps cycle types in CycleTypeArrayTable instead of CycleTypeTable"""
+		super().__init__(node_table, backend)
+		if local_reduced_stress_manager_table is None:
+			self._local_reduced_stress_manager_table = None
+		elif isinstance(local_reduced_stress_manager_table, LocalReducedStressManagerTable):
+			self._local_reduced_stress_manager_table=weakref.ref(local_reduced_stress_manager_table)
+		else:
+			raise ValueError
+		
+		if elastic_reduced_stress_manager_table is None:
+			self._elastic_reduced_stress_manager_table = None
+		elif isinstance(elastic_reduced_stress_manager_table, ElasticReducedStressManagerTable):
+			self._elastic_reduced_stress_manager_table=weakref.ref(elastic_reduced_stress_manager_table)
+		else:
+			raise ValueError
+	
+	@property
+	def elastic_reduced_stress_manager_table(self):
+		if self._elastic_reduced_stress_manager_table is None:
+			return None
+		else:
+			return self._elastic_reduced_stress_manager_table()
 			
 	@property
 	def local_reduced_stress_manager_table(self):
@@ -191,48 +1657,58 @@ class CycleTypeManagerTable(collections.UserDict):
 			return None
 		else:
 			return self._local_reduced_stress_manager_table()
-			
-	
-	def parse_accumulated_fatigue_damage_file(self, file):
-		current_context = self.AccumulatedFatigueDamageFileLineContext.SEARCH_NODE_NUM
-		current_table = None
-		current_nodenum = None
-		necessary_component = None
-		necessary_base_moment = None
-		find_node_num_pattern = re.compile('(?<=\>\sCalculation\snode:\s)\d+')
-		find_node_component_pattern = re.compile('(?<=\>\sComponent\snumber:\s)\d+')
-		find_node_basemoment_pattern = re.compile('(?<=\>\sBase\scalculated\smoment\sof\stime\s)\d+')
-		with open(file, mode='r') as f:
-			for line in f:
-				if current_context == self.AccumulatedFatigueDamageFileLineContext.SEARCH_NODE_NUM:
-					result = re.search(find_node_num_pattern, line)
-					if result:
-						current_nodenum = int(result.group(0))
-						if self.node_table.get(current_nodenum):
-							necessary_component = self.node_table[current_nodenum].component
-							necessary_base_moment = self.node_table[current_nodenum].base_moment
-							current_table = CycleTypeTable(int(result.group(0)), self)
-							current_context = self.AccumulatedFatigueDamageFileLineContext.SEARCH_NUM_COMPONENT_NUM
-				elif current_context == self.AccumulatedFatigueDamageFileLineContext.SEARCH_NUM_COMPONENT_NUM:
-					result = re.search(find_node_component_pattern, line)
-					if result and necessary_component == int(result.group(0)):
-						current_context = self.AccumulatedFatigueDamageFileLineContext.SEARCH_NODE_BM
-				elif current_context == self.AccumulatedFatigueDamageFileLineContext.SEARCH_NODE_BM:
-					result = re.search(find_node_basemoment_pattern, line)
-					if result and necessary_base_moment == int(result.group(0)):
-						current_context = self.AccumulatedFatigueDamageFileLineContext.READ_RECORD
-						header = 2
-				elif current_context == self.AccumulatedFatigueDamageFileLineContext.READ_RECORD:
-					if header > 0:
-						header -= 1
-					else:
-						temp_list = line.replace(',','.').strip().split()
-						try:
-							CycleTypeRecord(current_table, int(temp_list[0]), int(temp_list[2]), float(temp_list[7]), float(temp_list[5]), float(temp_list[6]), float(temp_list[9]), float(temp_list[8]), float(temp_list[10]), float(temp_list[19]), float(temp_list[20]), float(temp_list[21]))
-						except (ValueError, IndexError ) as vi:
-							current_table.sort(key = lambda a: a.a, reverse=True)
-							current_context = self.AccumulatedFatigueDamageFileLineContext.SEARCH_NODE_NUM
+
+	@staticmethod
+	def bound_records(records, limit=None, max_rows=None):
+		"""Apply limit and max_rows of CycleTypeRows to records of to_compact sorted by damage
+
+		The bounded records are a prefix, a structured array stays a view of records.
+		"""
+		records = records[:max_rows]
+		if limit is None:
+			return records
+		if np is not None and isinstance(records, np.ndarray):
+			return records[:np.searchsorted(-records['a'], -limit, side='left')]
+		return list(itertools.takewhile(lambda a: a[-1] > limit, records))
+
+	@staticmethod
+	def _read_record(rows, temp_list):
+		rows.add(temp_list)
+
+	def _table_rows(self, limit=None, max_rows=None):
+		return CycleTypeRows(limit, max_rows)
+
+	# with an index fewer wanted nodes are parsed in this process, a pool would cost more than it saves
+	PARALLEL_NODES = 64
+
+	def _parse_parallel(self, file, nodes, index, limit, max_rows, jobs, executor):
+		if executor is None:
+			with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+				return self._parse_parallel(file, nodes, index, limit, max_rows, jobs, executor)
+		if index is None:
+			with self.scanner(file) as scanner:
+				parts = [(start, end, None) for start, end in scanner.chunks(jobs * 4)]
+		else:
+			# the wanted nodes of the index are spread over the workers
+			wanted = self._wanted_nodes(nodes)
+			parts = [(0, None, part) for part in index.split(jobs * 4, wanted)]
+		compact_node_table = self.node_table.to_compact(nodes)
+		futures = [executor.submit(_parse_accumulated_fatigue_damage_range, file, compact_node_table, nodes, start, end, self._backend, limit, max_rows, part) for start, end, part in parts]
+		for future in futures:
+			self.load_compact(*future.result())
+
+	def parse_accumulated_fatigue_damage_file(self, file, nodes=None, index=None, engine='mmap', jobs=1, executor=None, limit=None, max_rows=None):
+		"""With jobs > 1 the file is split into byte ranges at node headers which are parsed by a pool
+		of worker processes (or by executor when given). With index the wanted nodes of the index
+		are split between the workers instead, when all nodes or at least PARALLEL_NODES are wanted.
+		Rows with damage a <= limit are dropped and only max_rows rows with the largest damage
+		are kept for every node.
+		"""
+		if jobs > 1 and engine == 'mmap' and compression(file) is None and (index is None or nodes is None or len(nodes) >= self.PARALLEL_NODES):
+			return self._parse_parallel(file, nodes, index, limit, max_rows, jobs, executor)
+		return self._parse_file(file, nodes, index, engine, limit=limit, max_rows=max_rows)
 	
+
 class LocalReducedStressRecord(ChildMixin):
 	__slots__ = ['_num', '_temp', '_list', '_parent']
 	def __init__(self, num, parent= None, temp:float=20.0, si:float=0.0, sj:float=0.0, sk:float=0.0):
@@ -299,80 +1775,211 @@ class LocalReducedStressTable(collections.UserDict, ChildMixin):
 	def nodenum(self):
 		return self._nodenum
 	
+	def append_values(self, values):
+		num, temp, si, sj, sk = values
+		LocalReducedStressRecord(num, self, temp, si, sj, sk)
+	
+	def extend_values(self, rows):
+		if np is not None and isinstance(rows, np.ndarray):
+			rows = rows.tolist()
+		for values in rows:
+			self.append_values(values)
+	
+	def as_tuples(self):
+		return [(i.num, i.temp, i.si, i.sj, i.sk) for i in self.values()]
+	
 	def print_table(self):
 		print('id        temp      sij       sjk       sik')
 		for moment, m in self.items():
 			print("{moment:<10}{temp:<10.1f}{sij:<10.2f}{sjk:<10.2f}{sik:<10.2f}".format(moment=moment, temp=m.temp, sij=m.sij, sjk=m.sjk, sik=m.sik))
 
-			
 
-class LocalReducedStressManagerTable(collections.UserDict):
-	class LocalReducedStresFileLineContext(enum.Enum):
-		SEARCH_NODE_NUM = 0
-		SEARCH_NODE_BM = 1
-		READ_RECORD = 2
-		
-	def __init__(self, node_table):
-		super().__init__()
-		if node_table is None:
-			self._node_table = None
-		elif isinstance(node_table, NodeTable):
-			self._node_table=weakref.ref(node_table)
-		else:
-			raise ValueError
+class LocalReducedStressRecordView():
+	"""LocalReducedStressRecord interface over a row of LocalReducedStressArrayTable"""
+	__slots__ = ['_parent', '_i']
+	def __init__(self, parent, i):
+		self._parent = parent
+		self._i = i
 	
 	@property
-	def node_table(self):
-		if self._node_table is None:
-			return None
+	def parent(self):
+		return self._parent
+	
+	@property
+	def num(self):
+		return int(self._parent.column('num')[self._i])
+	
+	@property
+	def temp(self):
+		return float(self._parent.column('temp')[self._i])
+	
+	@property
+	def si(self):
+		return float(self._parent.stress[self._i, 0])
+	
+	@property
+	def sj(self):
+		return float(self._parent.stress[self._i, 1])
+	
+	@property
+	def sk(self):
+		return float(self._parent.stress[self._i, 2])
+	
+	@property
+	def sij(self):
+		return float(self._parent.differences[self._i, 0])
+	
+	@property
+	def sjk(self):
+		return float(self._parent.differences[self._i, 1])
+	
+	@property
+	def sik(self):
+		return float(self._parent.differences[self._i, 2])
+	
+	@property
+	def vec(self):
+		return self._parent.stress[self._i].tolist() + self._parent.differences[self._i].tolist()
+
+
+class LocalReducedStressArrayTable(collections.abc.Mapping, ChildMixin):
+	"""LocalReducedStressTable stored in columns: moment ids, temperatures and a Nx3 array of principal stresses.
+
+	The stress differences sij, sjk, sik are computed for the whole table at once.
+	Moment ids are expected to be unique within a table.
+	"""
+	FIELDS = (('num', 'i8'), ('temp', 'f8'), ('si', 'f8'), ('sj', 'f8'), ('sk', 'f8'))
+	def __init__(self, nodenum, parent):
+		if np is None:
+			raise ImportError('NumPy is required for LocalReducedStressArrayTable')
+		self._nodenum = nodenum
+		self._num = np.empty(0, dtype=np.int64)
+		self._temp = np.empty(0, dtype=np.float64)
+		self._stress = np.empty((0, 3), dtype=np.float64)
+		self._differences = None
+		self._rows = None
+		self._pending = []
+		super().__init__(parent, LocalReducedStressManagerTable, nodenum)
+	
+	@property
+	def nodenum(self):
+		return self._nodenum
+	
+	def _flush(self):
+		if self._pending:
+			pending = np.array(self._pending, dtype=np.float64).reshape(-1, 5)
+			self._pending = []
+			self.extend_columns(pending[:, 0].astype(np.int64), pending[:, 1], pending[:, 2:])
+	
+	def set_columns(self, num, temp, stress):
+		"""Replace the table with the arrays without copying them"""
+		self._pending = []
+		self._num = num
+		self._temp = temp
+		self._stress = stress
+		self._differences = None
+		self._rows = None
+	
+	def extend_columns(self, num, temp, stress):
+		self._flush()
+		self._num = np.concatenate((self._num, num))
+		self._temp = np.concatenate((self._temp, temp))
+		self._stress = np.concatenate((self._stress, stress))
+		self._differences = None
+		self._rows = None
+	
+	def append_values(self, values):
+		self._pending.append(values)
+	
+	def extend_values(self, rows):
+		if isinstance(rows, np.ndarray):
+			self.extend_columns(rows['num'], rows['temp'], np.column_stack((rows['si'], rows['sj'], rows['sk'])))
 		else:
-			return self._node_table()
+			self._pending.extend(rows)
+	
+	def as_array(self):
+		self._flush()
+		data = np.empty(len(self._num), dtype=list(self.FIELDS))
+		data['num'] = self._num
+		data['temp'] = self._temp
+		data['si'], data['sj'], data['sk'] = self._stress.T
+		return data
+	
+	def as_tuples(self):
+		return self.as_array().tolist()
 	
 	@property
-	def length_of_tables(self):
-		return len(max(self.values(), key=lambda a: len(a)))
-	
-	def parse_local_redused_stress_file(self, file, verbose=False):
-		current_context = self.LocalReducedStresFileLineContext.SEARCH_NODE_NUM
-		current_table = None
-		current_nodenum = None
-		necessary_base_moment = None
-		find_node_num_pattern = re.compile('(?<=\>\sCalculation\snode\s)\d+')
-		find_node_basemoment_pattern = re.compile('(?<=\>\>moment\s)\d+(?=\s-\>\scalculation\sresults\sTable)')
-		start_header_passer = False
-		with open(file, mode='r') as f:
-			for line in f:
-				if current_context == self.LocalReducedStresFileLineContext.SEARCH_NODE_BM:
-					result = re.search(find_node_basemoment_pattern, line)
-					if result and necessary_base_moment == int(result.group(0)):
-						if verbose:
-							print('Find necessary_base_moment = {}'.format(necessary_base_moment))
-						current_context = self.LocalReducedStresFileLineContext.READ_RECORD
-						start_header_passer = True
-				elif current_context == self.LocalReducedStresFileLineContext.READ_RECORD:
-					if not start_header_passer:
-						try:
-							temp_list = line.replace(',','.').strip().split()
-							LocalReducedStressRecord(int(temp_list[0]), current_table, float(temp_list[1]), float(temp_list[5]), float(temp_list[6]), float(temp_list[7]))
-						except (ValueError, IndexError):
-							current_context = self.LocalReducedStresFileLineContext.SEARCH_NODE_NUM
-					else:
-						start_header_passer = False
-				if current_context == self.LocalReducedStresFileLineContext.SEARCH_NODE_NUM:
-					start_header_passer = False
-					result = re.search(find_node_num_pattern, line)
-					if result:
-						current_nodenum = int(result.group(0))
-						if self.node_table.get(current_nodenum):
-							if verbose:
-								print('Find node header = {}'.format(current_nodenum))
-							necessary_base_moment = self.node_table[current_nodenum].base_moment
-							current_table = LocalReducedStressTable(int(result.group(0)), self)
-							current_context = self.LocalReducedStresFileLineContext.SEARCH_NODE_BM
+	def stress(self):
+		self._flush()
+		return self._stress
+	
+	@property
+	def differences(self):
+		"""Nx3 array of sij, sjk, sik"""
+		if self._differences is None:
+			stress = self.stress
+			self._differences = stress[:, [0, 1, 0]] - stress[:, [1, 2, 2]]
+		return self._differences
+	
+	def column(self, name):
+		"""Zero copy array of num, temp, si, sj, sk, sij, sjk or sik"""
+		if name == 'num':
+			self._flush()
+			return self._num
+		elif name == 'temp':
+			self._flush()
+			return self._temp
+		elif name in ('si', 'sj', 'sk'):
+			return self.stress[:, ('si', 'sj', 'sk').index(name)]
+		elif name in ('sij', 'sjk', 'sik'):
+			return self.differences[:, ('sij', 'sjk', 'sik').index(name)]
+		raise KeyError(name)
+	
+	def __len__(self):
+		return len(self._num) + len(self._pending)
+	
+	def __iter__(self):
+		return iter(self.column('num').tolist())
+	
+	def __getitem__(self, num):
+		if self._rows is None:
+			self._rows = {n: i for i, n in enumerate(self.column('num').tolist())}
+		return LocalReducedStressRecordView(self, self._rows[num])
+	
+	def values(self):
+		return [LocalReducedStressRecordView(self, i) for i in range(len(self))]
+	
+	def items(self):
+		return list(zip(self.column('num').tolist(), self.values()))
+	
+	def print_table(self):
+		print('id        temp      sij       sjk       sik')
+		differences = self.differences
+		for moment, temp, (sij, sjk, sik) in zip(self.column('num').tolist(), self.column('temp').tolist(), differences.tolist()):
+			print("{moment:<10}{temp:<10.1f}{sij:<10.2f}{sjk:<10.2f}{sik:<10.2f}".format(moment=moment, temp=temp, sij=sij, sjk=sjk, sik=sik))
+
+
+class LocalReducedStressManagerTable(ReportManagerTable):
+	TABLE_TYPES = {'list': LocalReducedStressTable, 'array': LocalReducedStressArrayTable}
+	HEADER_LINES = 1
+	FIND_NODE_LITERALS = ('Calculation', None, '>>moment')
+	FIND_NODE_NUM_PATTERN = re.compile(r'(?<=\>\sCalculation\snode\s)\d+')
+	FIND_NODE_BASEMOMENT_PATTERN = re.compile(r'(?<=\>\>moment\s)\d+(?=\s-\>\scalculation\sresults\sTable)')
+
+	SCAN_NODE_NUM_PATTERN = scan_pattern(r'> Calculation node (\d+)')
+	SCAN_NODE_BASEMOMENT_PATTERN = scan_pattern(r'>>moment (\d+) -> calculation results Table')
+	COLUMNS = ((0, int), (1, float), (5, float), (6, float), (7, float))
+
+	def __init__(self, node_table, backend='list'):
+		"""backend='array' keeps stresses in LocalReducedStressArrayTable instead of LocalReducedStressTable"""
+		super().__init__(node_table, backend)
+
+	def parse_local_redused_stress_file(self, file, verbose=False, nodes=None, index=None, engine='mmap'):
+		return self._parse_file(file, nodes, index, engine, verbose)
 						
 class NodeRecord(ChildMixin):
+	__slots__ = ['_num', '_damage', '_base_moment', '_component', '_parent']
 	def __init__(self, num, parent=None, damage:float=0.0, base_moment:int=0, component:int=0):
-		__slots__ = ['_num', '_damage', '_base_moment', '_component', '_parent']
 		self._num = num
 		self._damage = damage
 		self._base_moment = base_moment
@@ -415,30 +2022,119 @@ class NodeRecord(ChildMixin):
 			self._component = value
 		else:
 			raise ValueError
-		
-class NodeTable(collections.UserDict):
+
+
+class NodeTableMixin():
+	"""Output of NodeTable and NodeArrayTable"""
 	OUTPUT_HEADER = 'nodenum   damage          bm    component'
 	OUTPUT_FORMAT = "{node:<10}{damage:<10.5e}{bm:6}{c:>6}"
+
+	def print_table_by_list(self, list_of_nodes, sort_by_damage=True):
+		print(self.OUTPUT_HEADER)
+		ld = []
+		for item in list_of_nodes:
+			ld.append((item, self[item]))
+		if sort_by_damage:
+			ld.sort(key=lambda a: a[1].damage,reverse=True)
+		for nodenum, node in ld:
+			print(self.OUTPUT_FORMAT.format(node=nodenum, damage=node.damage, bm=node.base_moment, c=node.component))
+
+
+class NodeTable(collections.UserDict, NodeTableMixin):
 	def __init__(self):
 		super().__init__()
 		self._dindex = None
+	
+	def to_compact(self, nodes=None):
+		return [(i.num, i.damage, i.base_moment, i.component) for i in self.values() if nodes is None or i.num in nodes]
+	
+	@classmethod
+	def from_compact(cls, data):
+		nt = cls()
+		for num, damage, base_moment, component in data:
+			NodeRecord(num, nt, damage, base_moment, component)
+		return nt
 		
 	def parse_base_moments(self, file):
-		extract = lambda typ, line, sign: typ(line.split(sign)[1].strip())
-		with open(file, mode='r') as f:
-			for line in f: 
-				if line.startswith('Calculation'):
-					current_node = extract(int, line, ':')
-					NodeRecord(current_node, self)
-				elif line.startswith('a = '):
-					self[current_node].damage = extract(float, line.replace(',','.').strip().strip('.'), '=')
-				elif line.startswith('Base calculated moment of time'):
-					self[current_node].base_moment = extract(int, line.replace(',',''), ':')
-				elif line.startswith('reduced sterss component'):
-					self[current_node].component = extract(int, line.replace('.',''), ':')
-				else:
-					pass
+		with open_report(file) as f:
+			self._read_lines(f)
 	
+	def _read_lines(self, lines):
+		for num, damage, base_moment, component in self._read_nodes(lines):
+			NodeRecord(num, self, damage, base_moment, component)
+
+	@staticmethod
+	def _read_nodes(lines):
+		"""Yield (num, damage, base_moment, component) of every node block of BaseMoments lines.
+
+		The values are checked as the setters of NodeRecord do, a missing value is 0.
+		"""
+		extract = lambda typ, line, sign: typ(line.split(sign)[1].strip())
+		num, damage, base_moment, component = None, 0.0, 0, 0
+		for line in lines:
+			if line.startswith('Calculation'):
+				if num is not None:
+					yield num, damage, base_moment, component
+				num, damage, base_moment, component = extract(int, line, ':'), 0.0, 0, 0
+			elif num is None:
+				continue
+			elif line.startswith('a = '):
+				if damage != 0.0:
+					raise ValueError(line)
+				damage = extract(float, line.replace(',','.').strip().strip('.'), '=')
+				if damage < 0.0:
+					raise ValueError(line)
+			elif line.startswith('Base calculated moment of time'):
+				if base_moment != 0:
+					raise ValueError(line)
+				base_moment = extract(int, line.replace(',',''), ':')
+				if base_moment < 0:
+					raise ValueError(line)
+			elif line.startswith('reduced sterss component'):
+				if component != 0:
+					raise ValueError(line)
+				component = extract(int, line.replace('.',''), ':')
+				if component not in (1, 2, 3):
+					raise ValueError(line)
+		if num is not None:
+			yield num, damage, base_moment, component
+
+	SCAN_NODE_PATTERN = rb'^Calculation[^:\n]*:[ \t]*%d\b'
+
+	def read_node(self, file, num):
+		"""Add only node num of the BaseMoments file, which is found by a byte search instead of a parse of the whole file.
+
+		Return the record or None when the file has no such node.
+		"""
+		if compression(file) is not None:
+			with open_report(file) as f:
+				self._read_lines(self._node_lines(f, num))
+		else:
+			with open(file, mode='rb') as f:
+				if os.fstat(f.fileno()).st_size == 0:
+					return None
+				with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+					found = re.compile(self.SCAN_NODE_PATTERN % num, re.M).search(mm)
+					if found is None:
+						return None
+					end = mm.find(b'\nCalculation', found.end())
+					block = mm[found.start():len(mm) if end < 0 else end + 1]
+			self._read_lines(block.decode().splitlines(True))
+		self._dindex = None
+		return self.get(num)
+
+	@staticmethod
+	def _node_lines(lines, num):
+		"""Lines of the block of node num"""
+		inside = False
+		for line in lines:
+			if line.startswith('Calculation'):
+				if inside:
+					return
+				inside = int(line.split(':')[1].strip()) == num
+			if inside:
+				yield line
+
 	def get_damage_index(self, num=None):
 		if self._dindex is None:
 			self._dindex = sorted(self.values(), key=lambda a: a.damage,reverse=True)
@@ -462,52 +2158,197 @@ class NodeTable(collections.UserDict):
 				if num >= limit:
 					break
 				print(self.OUTPUT_FORMAT.format(node=nodenum, damage=node.damage, bm=node.base_moment, c=node.component))
-	
-	def print_table_by_list(self, list_of_nodes, sort_by_damage=True):
-		print(self.OUTPUT_HEADER)
-		ld = []
-		for item in list_of_nodes:
-			ld.append(self[item])
-		if sort_by_damage:
-			ld.sort(key=lambda a: a[1].damage,reverse=True)
-		for nodenum, node in ld:
-			print(self.OUTPUT_FORMAT.format(node=nodenum, damage=node.damage, bm=node.base_moment, c=node.component)) 
 
 
-class ElasticReducedStressRecord(ChildMixin):
-	__slots__ = ['_parent', '_num', '_temp', '_rpe', '_nu', '_ksi', '_lb', '_lh', '_sll', '_sfl', '_rid']
-	def __init__(self, parent, num, temp, rpe, nu, ksi=None, lb=None, lh=None, sll=0.0, sfl=0.0):
-		super().__init__(parent, ElasticReducedStressTable, num)
-		self._num = num
-		self._temp = temp
-		self._rpe = rpe
-		self._nu = nu
-		self._ksi = ksi
-		self._lb = lb
-		self._lh = lh
-		self._sll = sll
-		self._sfl = sfl
-		self._rid = None
-
-	@property
-	def num(self):
-		"""ДМВ"""
-		return self._num
+class NodeRecordView():
+	"""NodeRecord interface over a row of NodeArrayTable"""
+	__slots__ = ['_parent', '_i']
+	def __init__(self, parent, i):
+		self._parent = parent
+		self._i = i
 	
 	@property
-	def temp(self):
-		u"""T, °C"""
-		return self._temp
+	def parent(self):
+		return self._parent
 	
 	@property
-	def rpe(self):
-		"""Rpe, МПа"""
-		return self._rpe
+	def num(self):
+		return int(self._parent.column('num')[self._i])
 	
 	@property
-	def nu(self):
-		u"""ν"""
-		return self._nu
+	def damage(self):
+		return float(self._parent.column('damage')[self._i])
+	
+	@property
+	def base_moment(self):
+		return int(self._parent.column('base_moment')[self._i])
+	
+	@property
+	def component(self):
+		return int(self._parent.column('component')[self._i])
+
+
+class NodeArrayTable(collections.abc.Mapping, NodeTableMixin):
+	"""NodeTable stored in parallel num, damage, base_moment and component arrays.
+
+	Nodes are found by a binary search over the sorted node numbers and returned as NodeRecordView,
+	the nodes with the largest damage are selected with argpartition instead of sorting the whole table.
+	"""
+	FIELDS = (('num', 'i8'), ('damage', 'f8'), ('base_moment', 'i8'), ('component', 'i8'))
+	def __init__(self, data=None):
+		if np is None:
+			raise ImportError('NumPy is required for NodeArrayTable')
+		self._columns = None
+		self._order = None
+		self._sorted = None
+		self.set_array(np.empty(0, dtype=list(self.FIELDS)) if data is None else data)
+	
+	def set_array(self, data):
+		"""Replace the table with the columns of a structured array of FIELDS"""
+		self._columns = {name: data[name] for name, kind in self.FIELDS}
+		self._order = np.argsort(self._columns['num'], kind='stable')
+		self._sorted = self._columns['num'][self._order]
+	
+	def column(self, name):
+		return self._columns[name]
+	
+	def as_array(self):
+		data = np.empty(len(self), dtype=list(self.FIELDS))
+		for name, kind in self.FIELDS:
+			data[name] = self._columns[name]
+		return data
+	
+	def to_compact(self, nodes=None):
+		data = self.as_array()
+		if nodes is not None:
+			data = data[np.isin(data['num'], np.fromiter(nodes, dtype=np.int64, count=len(nodes)))]
+		return data.tolist()
+	
+	@classmethod
+	def from_compact(cls, data):
+		return cls(np.array(data, dtype=list(cls.FIELDS)).reshape(-1))
+	
+	def parse_base_moments(self, file):
+		# the nodes go into the array without lists of Python objects
+		with open_report(file) as f:
+			data = np.fromiter(NodeTable._read_nodes(f), dtype=list(self.FIELDS))
+		unique, first = np.unique(data['num'], return_index=True)
+		if len(unique) < len(data):
+			# a repeated node replaces the values but keeps the position of its first block as in NodeTable
+			unique, last = np.unique(data['num'][::-1], return_index=True)
+			data = data[(len(data) - 1 - last)[np.argsort(first)]]
+		self.set_array(data)
+	
+	def _row(self, num):
+		if not isinstance(num, (int, np.integer)):
+			return None
+		i = int(np.searchsorted(self._sorted, num))
+		if i < len(self._sorted) and self._sorted[i] == num:
+			return int(self._order[i])
+		return None
+	
+	def __len__(self):
+		return len(self._sorted)
+	
+	def __iter__(self):
+		return iter(self._columns['num'].tolist())
+	
+	def __contains__(self, num):
+		return self._row(num) is not None
+	
+	def __getitem__(self, num):
+		i = self._row(num)
+		if i is None:
+			raise KeyError(num)
+		return NodeRecordView(self, i)
+	
+	def damage_rows(self, num=None):
+		"""Rows of the num nodes with the largest damage, in the order of the stable sort of NodeTable"""
+		damage = self._columns['damage']
+		if num is None or num >= len(damage):
+			return np.argsort(-damage, kind='stable')
+		if num <= 0:
+			return np.empty(0, dtype=np.intp)
+		threshold = damage[np.argpartition(-damage, num - 1)[num - 1]]
+		above = np.flatnonzero(damage > threshold)
+		# equal damages at the boundary are taken in the file order
+		rows = np.sort(np.concatenate((above, np.flatnonzero(damage == threshold)[:num - len(above)])))
+		return rows[np.argsort(-damage[rows], kind='stable')]
+	
+	def get_damage_index(self, num=None):
+		return [NodeRecordView(self, i) for i in self.damage_rows(num).tolist()]
+	
+	def print_table(self, limit=0, sort_by_damage=False):
+		print(self.OUTPUT_HEADER)
+		if limit is None or limit <= 0:
+			limit = None
+		if sort_by_damage:
+			rows = self.damage_rows(limit)
+		else:
+			rows = np.arange(len(self) if limit is None else min(limit, len(self)))
+		columns = [self._columns[name][rows].tolist() for name in ('num', 'damage', 'base_moment', 'component')]
+		for nodenum, damage, bm, c in zip(*columns):
+			print(self.OUTPUT_FORMAT.format(node=nodenum, damage=damage, bm=bm, c=c))
+
+
+def node_table_type(backend='list'):
+	"""NodeTable or NodeArrayTable for the backend of the manager tables"""
+	if backend == 'list':
+		return NodeTable
+	elif backend == 'array':
+		if np is None:
+			raise ImportError('NumPy is required for the array backend')
+		return NodeArrayTable
+	raise ValueError(backend)
+
+
+class ElasticReducedStressRecordMixin():
+	"""Output of ElasticReducedStressRecord and ElasticReducedStressRecordView"""
+	__slots__ = ()
+	def print_info(self):
+		st = type(self)
+		for prop in st.num, st.temp, st.rpe, st.nu, st.ksi, st.lb, st.lh, st.sll, st.sfl, st.real_id:
+			if prop.fget(self) is not None:
+				print(u"{:10}: {:>14}".format(prop.fget.__doc__, prop.fget(self)))
+			else:
+				print(u"{:10}:              -".format(prop.fget.__doc__))
+		print('')
+
+
+class ElasticReducedStressRecord(ChildMixin, ElasticReducedStressRecordMixin):
+	__slots__ = ['_parent', '_num', '_temp', '_rpe', '_nu', '_ksi', '_lb', '_lh', '_sll', '_sfl', '_rid']
+	def __init__(self, parent, num, temp, rpe, nu, ksi=None, lb=None, lh=None, sll=0.0, sfl=0.0):
+		super().__init__(parent, ElasticReducedStressTable, num)
+		self._num = num
+		self._temp = temp
+		self._rpe = rpe
+		self._nu = nu
+		self._ksi = ksi
+		self._lb = lb
+		self._lh = lh
+		self._sll = sll
+		self._sfl = sfl
+		self._rid = None
+
+	@property
+	def num(self):
+		"""ДМВ"""
+		return self._num
+	
+	@property
+	def temp(self):
+		u"""T, °C"""
+		return self._temp
+	
+	@property
+	def rpe(self):
+		"""Rpe, МПа"""
+		return self._rpe
+	
+	@property
+	def nu(self):
+		u"""ν"""
+		return self._nu
 	
 	@property
 	def ksi(self):
@@ -538,37 +2379,91 @@ class ElasticReducedStressRecord(ChildMixin):
 	def real_id(self):
 		"""РМВ"""
 		if self.parent:
-			nn = self.parent.nodenum
-			lt = self.parent.parent.local_reduced_stress_manager_table[nn]
-			for key, values in lt.items():
-				if math.isclose(self.temp, values.temp, abs_tol=1E-2) and math.isclose(self.sll,values.vec[2+self.parent.parent.node_table[nn].component],abs_tol=1E-4):
-					self._rid = key
+			rid = self.parent.expansion_index.real_id(self.temp, self.sll)
+			if rid is not None:
+				self._rid = rid
 		return self._rid
-	
-	def print_info(self):
-		st = type(self)
-		for prop in st.num, st.temp, st.rpe, st.nu, st.ksi, st.lb, st.lh, st.sll, st.sfl, st.real_id:
-			if prop.fget(self) is not None:
-				print(u"{:10}: {:>14}".format(prop.fget.__doc__, prop.fget(self)))
-			else:
-				print(u"{:10}:              -".format(prop.fget.__doc__))
-		print('')
-	
-class ElasticReducedStressTable(collections.UserDict, ChildMixin):
-	def __init__(self, nodenum, parent):
-		self._nodenum = nodenum
-		super().__init__()
-		super(collections.UserDict, self).__init__(parent, ElasticReducedStressManagerTable, nodenum)
 
+
+class HistoryExpansionIndex():
+	"""Real moment ids (РМВ) of the records of an elastic reduced stress table.
+
+	Local moments are sorted by the reduced stress of the node component and elastic records by sfl.
+	A lookup bisects the tolerance window and checks the candidates with math.isclose,
+	so the answers are the same as of a linear scan: the last matching local moment
+	and the first matching elastic record. Results are memoized.
+	"""
+	STRESS_TOL = 1E-4
+	TEMP_TOL = 1E-2
+	def __init__(self, elastic_table, local_table, component):
+		if isinstance(local_table, LocalReducedStressArrayTable):
+			keys = local_table.column('num').tolist()
+			temps = local_table.column('temp').tolist()
+			stresses = local_table.column(('sij', 'sjk', 'sik')[component-1]).tolist()
+		else:
+			keys = list(local_table.keys())
+			temps = [i.temp for i in local_table.values()]
+			stresses = [i.vec[2+component] for i in local_table.values()]
+		order = sorted(range(len(keys)), key=stresses.__getitem__)
+		self._local_stress = [stresses[i] for i in order]
+		self._local = [(i, keys[i], temps[i]) for i in order]
+		records = sorted(enumerate(elastic_table.values()), key=lambda a: (a[1].sfl, a[0]))
+		self._elastic_stress = [i.sfl for pos, i in records]
+		self._elastic = records
+		self._real_ids = {}
+		self._search = {}
+
+	@staticmethod
+	def _window(values, x, tol):
+		# math.isclose also accepts the default relative tolerance of 1E-9
+		w = max(tol, 1.1E-9 * abs(x)) * 1.000001
+		return bisect.bisect_left(values, x - w), bisect.bisect_right(values, x + w)
+
+	def real_id(self, temp, stress):
+		"""Id of the last local moment with the same temperature and reduced stress"""
+		key = (temp, stress)
+		if key not in self._real_ids:
+			rid = None
+			position = -1
+			lo, hi = self._window(self._local_stress, stress, self.STRESS_TOL)
+			for i in range(lo, hi):
+				pos, num, local_temp = self._local[i]
+				if pos > position and math.isclose(temp, local_temp, abs_tol=self.TEMP_TOL) and math.isclose(stress, self._local_stress[i], abs_tol=self.STRESS_TOL):
+					rid = num
+					position = pos
+			self._real_ids[key] = rid
+		return self._real_ids[key]
+
+	def search_real_id(self, stress):
+		"""Real id of the first elastic record with sfl equal to stress"""
+		if stress not in self._search:
+			record = None
+			position = None
+			lo, hi = self._window(self._elastic_stress, stress, self.STRESS_TOL)
+			for i in range(lo, hi):
+				pos, item = self._elastic[i]
+				if (position is None or pos < position) and math.isclose(item.sfl, stress, abs_tol=self.STRESS_TOL):
+					record = item
+					position = pos
+			self._search[stress] = None if record is None else self.real_id(record.temp, record.sll)
+		return self._search[stress]
+
+
+class ElasticReducedStressTableMixin():
+	"""History expansion and plots of ElasticReducedStressTable and ElasticReducedStressArrayTable"""
 	@property
-	def nodenum(self):
-		return self._nodenum
-	
+	def expansion_index(self):
+		if self._expansion_index is None:
+			nn = self.nodenum
+			self._expansion_index = HistoryExpansionIndex(self, self.parent.local_reduced_stress_manager_table[nn], self.parent.node_table[nn].component)
+		return self._expansion_index
 	
 	def search_real_id(self, stress):
-		for item in self.values():
-			if math.isclose(item.sfl, stress,abs_tol=1E-4):
-				return item.real_id
+		return self.expansion_index.search_real_id(stress)
+	
+	def reset_expansion_index(self):
+		"""The index is built again on the next use, e.g. after the local table of the node was replaced"""
+		self._expansion_index = None
 	
 	def print_table(self):
 		pass
@@ -578,7 +2473,18 @@ class ElasticReducedStressTable(collections.UserDict, ChildMixin):
 	
 
 	
-	def plot_graph(self, x_entity, *y_entities):
+	def column(self, name):
+		"""Values of the record property name as an array, a missing ksi, lb or lh is nan"""
+		values = [getattr(a, name) for a in self.values()]
+		if None in values:
+			return np.array([np.nan if a is None else a for a in values], dtype=float)
+		return np.array(values)
+	
+	def plot_graph(self, x_entity, *y_entities, max_points=PLOT_POINTS):
+		"""Interactive plot of y_entities against x_entity, properties of ElasticReducedStressRecord.
+
+		Every line shows at most about max_points points of the visible x range, see minmax_indices().
+		"""
 		if np and plt:
 			ismarkered = False
 			def __onrb(label):
@@ -607,13 +2513,22 @@ class ElasticReducedStressTable(collections.UserDict, ChildMixin):
 			fig, ax = plt.subplots()
 			ax.set_title('Узел {}'.format(self.nodenum))
 			plt.subplots_adjust(left = 0.2)
-			v = self.values()
-			x_values = np.array(list(map(x_entity.fget, v)))
+			x_values = self.column(x_entity.fget.__name__)
 			ax.set_xlabel(x_entity.__doc__)
+			series = [self.column(i.fget.__name__) for i in y_entities]
 			plots = []
-			for i in y_entities:
-				y_value = np.array(list(map(i.fget, v)))
-				plots.append(ax.plot(x_values, y_value, linestyle='-', marker='.', markersize=0, picker=5))
+			for y_values in series:
+				i = minmax_indices(y_values, max_points)
+				plots.append(ax.plot(x_values[i], y_values[i], linestyle='-', marker='.', markersize=0, picker=5))
+			
+			def __onxlim(axes):
+				# the lines are decimated again for the zoomed range
+				low, high = axes.get_xlim()
+				visible = np.flatnonzero((x_values >= low) & (x_values <= high))
+				for plot, y_values in zip(plots, series):
+					i = visible[minmax_indices(y_values[visible], max_points)]
+					plot[0].set_data(x_values[i], y_values[i])
+			
 			ax.legend(list(map(lambda a: a.__doc__ ,y_entities)))
 			ax.grid(True)
 			rax = plt.axes([0.02, 0.775, 0.08, 0.08])
@@ -621,26 +2536,209 @@ class ElasticReducedStressTable(collections.UserDict, ChildMixin):
 			rb = plt_rb(rax, ('off', 'on'))
 			rb.on_clicked(__onrb)
 			fig.canvas.mpl_connect('pick_event', __onpick)
+			ax.callbacks.connect('xlim_changed', __onxlim)
 			plt.show()
 		else:
 			print('NumPy and Matplotlib Import error for graph')
-					
-class ElasticReducedStressManagerTable(collections.UserDict):
-	class ElasticReducedStressFileLineContext(enum.Enum):
-		SEARCH_NODE_NUM = 0
-		SEARCH_NUM_COMPONENT_NUM = 1
-		SEARCH_NODE_BM = 2
-		READ_RECORD = 3
-		
-	def __init__(self, node_table, local_reduced_stress_manager_table):
+
+
+class ElasticReducedStressTable(collections.UserDict, ChildMixin, ElasticReducedStressTableMixin):
+	def __init__(self, nodenum, parent):
+		self._nodenum = nodenum
+		self._expansion_index = None
 		super().__init__()
-		if node_table is None:
-			self._node_table = None
-		elif isinstance(node_table, NodeTable):
-			self._node_table=weakref.ref(node_table)
+		super(collections.UserDict, self).__init__(parent, ElasticReducedStressManagerTable, nodenum)
+
+	@property
+	def nodenum(self):
+		return self._nodenum
+	
+	def __setitem__(self, key, item):
+		self._expansion_index = None
+		super().__setitem__(key, item)
+	
+	def append_values(self, values):
+		ElasticReducedStressRecord(self, *values)
+	
+	def extend_values(self, rows):
+		if np is not None and isinstance(rows, np.ndarray):
+			rows = ElasticReducedStressArrayTable.to_tuples(rows)
+		for values in rows:
+			self.append_values(values)
+	
+	def as_tuples(self):
+		return [(i.num, i.temp, i.rpe, i.nu, i.ksi, i.lb, i.lh, i.sll, i.sfl) for i in self.values()]
+
+
+class ElasticReducedStressRecordView(ElasticReducedStressRecordMixin):
+	"""ElasticReducedStressRecord interface over a row of ElasticReducedStressArrayTable"""
+	__slots__ = ['_parent', '_row']
+	def __init__(self, parent, row):
+		self._parent = parent
+		self._row = row
+	
+	@property
+	def parent(self):
+		return self._parent
+	
+	def _int_which_may_be_missing(self, name):
+		value = int(self._row[name])
+		return None if value == ElasticReducedStressArrayTable.MISSING else value
+	
+	@property
+	def num(self):
+		"""ДМВ"""
+		return int(self._row['num'])
+	
+	@property
+	def temp(self):
+		u"""T, °C"""
+		return float(self._row['temp'])
+	
+	@property
+	def rpe(self):
+		"""Rpe, МПа"""
+		return float(self._row['rpe'])
+	
+	@property
+	def nu(self):
+		u"""ν"""
+		return float(self._row['nu'])
+	
+	@property
+	def ksi(self):
+		"""ξ"""
+		return self._int_which_may_be_missing('ksi')
+	
+	@property
+	def lb(self):
+		"""lb"""
+		return self._int_which_may_be_missing('lb')
+	
+	@property
+	def lh(self):
+		"""lh"""
+		return self._int_which_may_be_missing('lh')
+	
+	@property
+	def sll(self):
+		"""(σL)l, МПа"""
+		return float(self._row['sll'])
+	
+	@property
+	def sfl(self):
+		"""(σF)l, МПа"""
+		return float(self._row['sfl'])
+	
+	@property
+	def real_id(self):
+		"""РМВ"""
+		return self._parent.expansion_index.real_id(self.temp, self.sll)
+
+
+class ElasticReducedStressArrayTable(collections.abc.Mapping, ChildMixin, ElasticReducedStressTableMixin):
+	"""ElasticReducedStressTable stored in a NumPy structured array.
+
+	ksi, lb and lh given as '-' are stored as MISSING.
+	Rows are appended to a list and moved into the array on the first access of data.
+	"""
+	FIELDS = (('num', 'i8'), ('temp', 'f8'), ('rpe', 'f8'), ('nu', 'f8'), ('ksi', 'i8'), ('lb', 'i8'), ('lh', 'i8'), ('sll', 'f8'), ('sfl', 'f8'))
+	MISSING = -2**63
+	def __init__(self, nodenum, parent=None, data=None):
+		if np is None:
+			raise ImportError('NumPy is required for ElasticReducedStressArrayTable')
+		self._nodenum = nodenum
+		self._dtype = np.dtype(list(self.FIELDS))
+		self._data = np.empty(0, dtype=self._dtype) if data is None else data
+		self._pending = []
+		self._rows = None
+		self._expansion_index = None
+		super().__init__(parent, ElasticReducedStressManagerTable, nodenum)
+	
+	@property
+	def nodenum(self):
+		return self._nodenum
+	
+	@classmethod
+	def to_array(cls, rows):
+		"""Structured array of record field tuples"""
+		m = cls.MISSING
+		return np.array([(num, temp, rpe, nu, m if ksi is None else ksi, m if lb is None else lb, m if lh is None else lh, sll, sfl) for num, temp, rpe, nu, ksi, lb, lh, sll, sfl in rows], dtype=list(cls.FIELDS))
+	
+	@classmethod
+	def to_tuples(cls, data):
+		"""Record field tuples of a structured array"""
+		m = cls.MISSING
+		return [(num, temp, rpe, nu, None if ksi == m else ksi, None if lb == m else lb, None if lh == m else lh, sll, sfl) for num, temp, rpe, nu, ksi, lb, lh, sll, sfl in data.tolist()]
+	
+	@property
+	def data(self):
+		if self._pending:
+			self._data = np.concatenate((self._data, self.to_array(self._pending)))
+			self._pending = []
+			self._rows = None
+			self._expansion_index = None
+		return self._data
+	
+	def append_values(self, values):
+		self._pending.append(values)
+	
+	def extend_values(self, rows):
+		if isinstance(rows, np.ndarray):
+			self._data = np.concatenate((self.data, rows.astype(self._dtype, copy=False)))
+			self._rows = None
+			self._expansion_index = None
 		else:
-			raise ValueError
-		
+			self._pending.extend(rows)
+	
+	def as_array(self):
+		return self.data
+	
+	def as_tuples(self):
+		return self.to_tuples(self.data)
+	
+	def __len__(self):
+		return len(self._data) + len(self._pending)
+	
+	def __iter__(self):
+		return iter(self.data['num'].tolist())
+	
+	def __getitem__(self, num):
+		data = self.data
+		if self._rows is None:
+			self._rows = {n: i for i, n in enumerate(data['num'].tolist())}
+		return ElasticReducedStressRecordView(self, data[self._rows[num]])
+	
+	def values(self):
+		data = self.data
+		return [ElasticReducedStressRecordView(self, data[i]) for i in range(len(data))]
+	
+	def items(self):
+		return list(zip(self.data['num'].tolist(), self.values()))
+	
+	def column(self, name):
+		"""Column name of the array or values of the record property name, MISSING is nan"""
+		if name not in self._dtype.names:
+			return super().column(name)
+		values = self.data[name]
+		if values.dtype.kind == 'i' and (values == self.MISSING).any():
+			values = np.where(values == self.MISSING, np.nan, values)
+		return values
+
+
+class ElasticReducedStressManagerTable(ReportManagerTable):
+	TABLE_TYPES = {'list': ElasticReducedStressTable, 'array': ElasticReducedStressArrayTable}
+	FIND_NODE_NUM_PATTERN = re.compile(r'(?<=\>\sCalculation\snode\s)\d+')
+	FIND_NODE_COMPONENT_PATTERN = re.compile(r'(?<=\>\sComponent\snumber\s)\d+')
+	FIND_NODE_BASEMOMENT_PATTERN = re.compile(r'(?<=\>\sBase\scalculated\smoment\sof\stime\s)\d+')
+
+	SCAN_NODE_NUM_PATTERN = scan_pattern(r'> Calculation node (\d+)')
+	SCAN_NODE_COMPONENT_PATTERN = scan_pattern(r'> Component number (\d+)')
+	SCAN_NODE_BASEMOMENT_PATTERN = scan_pattern(r'> Base calculated moment of time (\d+)')
+
+	def __init__(self, node_table, local_reduced_stress_manager_table, backend='list'):
+		"""backend='array' keeps records in ElasticReducedStressArrayTable instead of ElasticReducedStressTable"""
+		super().__init__(node_table, backend)
 		if local_reduced_stress_manager_table is None:
 			self._local_reduced_stress_manager_table = None
 		elif isinstance(local_reduced_stress_manager_table,LocalReducedStressManagerTable):
@@ -648,13 +2746,6 @@ class ElasticReducedStressManagerTable(collections.UserDict):
 		else:
 			raise ValueError
 	
-	@property
-	def node_table(self):
-		if self._node_table is None:
-			return None
-		else:
-			return self._node_table()
-	
 	@property
 	def local_reduced_stress_manager_table(self):
 		if self._local_reduced_stress_manager_table is None:
@@ -668,62 +2759,350 @@ class ElasticReducedStressManagerTable(collections.UserDict):
 			return int(value)
 		except ValueError:
 			return None
-	
-	def parse_elastic_reduced_stress_file(self, file):
-		current_context = self.ElasticReducedStressFileLineContext.SEARCH_NODE_NUM
-		current_table = None
-		current_nodenum = None
-		necessary_component = None
-		necessary_base_moment = None
-		find_node_num_pattern = re.compile('(?<=\>\sCalculation\snode\s)\d+')
-		find_node_component_pattern = re.compile('(?<=\>\sComponent\snumber\s)\d+')
-		find_node_basemoment_pattern = re.compile('(?<=\>\sBase\scalculated\smoment\sof\stime\s)\d+')
-		with open(file, mode='r') as f:
-			for line in f:
-				if current_context == self.ElasticReducedStressFileLineContext.SEARCH_NUM_COMPONENT_NUM:
-					result = re.search(find_node_component_pattern, line)
-					if result and necessary_component == int(result.group(0)):
-						current_context = self.ElasticReducedStressFileLineContext.SEARCH_NODE_BM
-				elif current_context == self.ElasticReducedStressFileLineContext.SEARCH_NODE_BM:
-					result = re.search(find_node_basemoment_pattern, line)
-					if result and necessary_base_moment == int(result.group(0)):
-						current_context = self.ElasticReducedStressFileLineContext.READ_RECORD
-						header = 2
-				elif current_context == self.ElasticReducedStressFileLineContext.READ_RECORD:
-					if header > 0:
-						header -= 1
-					else:
-						temp_list = line.replace(',', '.').strip().split()
-						try:
-							ksi = self._read_int_wich_may_be_a_dash(temp_list[4])
-							lb = self._read_int_wich_may_be_a_dash(temp_list[5])
-							lh = self._read_int_wich_may_be_a_dash(temp_list[6])
-							ElasticReducedStressRecord(current_table, num=int(temp_list[0]), temp=float(temp_list[1]), rpe=float(temp_list[2]), nu=float(temp_list[3]),	sll=float(temp_list[-3]), sfl=float(temp_list[-1]), ksi=ksi, lb=lb, lh=lh)
-														
-						except (ValueError, IndexError ) as vi:
-							current_context = self.ElasticReducedStressFileLineContext.SEARCH_NODE_NUM
-				if current_context == self.ElasticReducedStressFileLineContext.SEARCH_NODE_NUM:
-					result = re.search(find_node_num_pattern, line)
-					if result:
-						current_nodenum = int(result.group(0))
-						if self.node_table.get(current_nodenum):
-							necessary_component = self.node_table[current_nodenum].component
-							necessary_base_moment = self.node_table[current_nodenum].base_moment
-							current_table = ElasticReducedStressTable(int(result.group(0)), self)
-							current_context = self.ElasticReducedStressFileLineContext.SEARCH_NUM_COMPONENT_NUM
-
-def save_in_workbook(manager_table, necessary_nodes=None, worksheet_name='ma', limit=1E-8, is_expanded=True, additional =False):
-	mb = openpyxl.Workbook()
-	chwidth = (("Тип цикла", 12),
-	          ("σFmax",     8.25),
-	          ("σFmin",     8.25),
-	          ("σaF",       8.25),
-	          ("Tmin",      8.25),
-	          ("Tmax",      8.25),
-	          ("r",         8),
-	          ("[N]",       11),
-	          ("N",         9),
-	          ("a",         10))
+
+	# a '-' of ksi, lb or lh is None
+	COLUMNS = ((0, int), (1, float), (2, float), (3, float), (4, _read_int_wich_may_be_a_dash.__func__), (5, _read_int_wich_may_be_a_dash.__func__),
+	           (6, _read_int_wich_may_be_a_dash.__func__), (-3, float), (-1, float))
+
+	@classmethod
+	def _block_records(cls, scanner, offset, end=None):
+		"""The '-' placeholders are read as MISSING. ksi, lb and lh are parsed as integers, so a token
+		like '1,0' fails the block and rows() gives None for it as _read_int_wich_may_be_a_dash() does.
+		"""
+		missing = ElasticReducedStressArrayTable.MISSING
+		records = scanner.table_records(offset, ElasticReducedStressArrayTable.FIELDS, tuple(i for i, read in cls.COLUMNS), str(missing).encode('ascii'), end)
+		# a dash in a float column stops the table in _read_record()
+		if records is None or any((records[name] == missing).any() for name, kind in ElasticReducedStressArrayTable.FIELDS if kind.startswith('f')):
+			return None
+		return records
+
+	def parse_elastic_reduced_stress_file(self, file, nodes=None, index=None, engine='mmap'):
+		return self._parse_file(file, nodes, index, engine)
+
+
+class CalculationModel():
+	"""Lazy access to the newest files of a calculation directory (the current one by default).
+
+	Nothing is parsed until a node is asked for: node(num) reads the BaseMoments block
+	and the report tables of that node only and keeps them in an LRU cache of cache_size nodes.
+	The reports are looked up by their ReportIndex sidecars (built on the first access) when index is True
+	and are scanned from the start otherwise; compressed reports are always read as streams.
+	"""
+	def __init__(self, directory=None, backend='list', cache_size=128, index=True):
+		if cache_size < 1:
+			raise ValueError('cache_size must be positive')
+		self._bfile = newest_file('BaseMoments', directory)
+		self._lfile = newest_file('Report (Local Reduced Stress)', directory)
+		self._efile = newest_file('Report (Elastic Reduced Stress)', directory)
+		self._cfile = newest_file('Report (Accumulated Fatigue Damage)', directory)
+		self._cache_size = cache_size
+		self._use_index = index
+		self._indexes = None
+		self._node_table = NodeTable()
+		self._lmt = LocalReducedStressManagerTable(self._node_table, backend)
+		self._emt = ElasticReducedStressManagerTable(self._node_table, self._lmt, backend)
+		self._ctt = CycleTypeManagerTable(self._node_table, self._lmt, self._emt, backend)
+		self._cached = collections.OrderedDict()
+
+	@property
+	def node_table(self):
+		"""Records of the nodes read so far"""
+		return self._node_table
+
+	@property
+	def local_reduced_stress_manager_table(self):
+		return self._lmt
+
+	@property
+	def elastic_reduced_stress_manager_table(self):
+		return self._emt
+
+	@property
+	def cycle_type_manager_table(self):
+		return self._ctt
+
+	@property
+	def cached_nodes(self):
+		"""Numbers of the cached nodes from the least to the most recently used"""
+		return list(self._cached)
+
+	def __contains__(self, num):
+		return self.record(num) is not None
+
+	def record(self, num):
+		"""NodeRecord of node num, None when BaseMoments has no such node"""
+		record = self._node_table.get(num)
+		if record is None:
+			record = self._node_table.read_node(self._bfile, num)
+		return record
+
+	def _open_indexes(self):
+		if self._indexes is None:
+			if self._use_index:
+				self._indexes = (self._lmt.open_index(self._lfile), self._emt.open_index(self._efile), self._ctt.open_index(self._cfile))
+			else:
+				self._indexes = (None, None, None)
+		return self._indexes
+
+	def node(self, num, limit=None, max_rows=None):
+		"""(local, elastic, cycles) tables of node num, parsed on the first access.
+
+		limit and max_rows bound the cycle types as in main() and are only applied when the node is parsed.
+		"""
+		if num in self._cached:
+			self._cached.move_to_end(num)
+		else:
+			if self.record(num) is None:
+				raise KeyError(num)
+			lindex, eindex, cindex = self._open_indexes()
+			nodes = {num}
+			self._lmt.parse_local_redused_stress_file(self._lfile, nodes=nodes, index=lindex)
+			self._emt.parse_elastic_reduced_stress_file(self._efile, nodes=nodes, index=eindex)
+			self._ctt.parse_accumulated_fatigue_damage_file(self._cfile, nodes=nodes, index=cindex, limit=limit, max_rows=max_rows)
+			self._cached[num] = None
+			while len(self._cached) > self._cache_size:
+				self.evict(next(iter(self._cached)))
+		return self._lmt.get(num), self._emt.get(num), self._ctt.get(num)
+
+	def evict(self, num):
+		"""Drop the parsed tables of node num, its record stays in the node table"""
+		self._cached.pop(num, None)
+		for mt in (self._lmt, self._emt, self._ctt):
+			mt.pop(num, None)
+
+	def clear(self):
+		for num in list(self._cached):
+			self.evict(num)
+
+
+PLOT_FIELDS = ('num', 'temp', 'rpe', 'nu', 'ksi', 'lb', 'lh', 'sll', 'sfl', 'real_id')
+
+
+def _render_graph(file, title, xlabel, labels, lines):
+	"""Worker of render_graphs(): draw the decimated lines into file on the Agg canvas, no display is used"""
+	fig = Figure()
+	FigureCanvasAgg(fig)
+	ax = fig.add_subplot()
+	ax.set_title(title)
+	ax.set_xlabel(xlabel)
+	for x_values, y_values in lines:
+		ax.plot(x_values, y_values, linestyle='-')
+	ax.legend(labels)
+	ax.grid(True)
+	fig.savefig(file)
+	return file
+
+
+def render_graphs(manager_table, nodes, x_name, y_names, directory='.', format='png', max_points=PLOT_POINTS, jobs=1):
+	"""Save the graph of y_names against x_name, names of PLOT_FIELDS, of the elastic reduced stress table
+	of every node into directory/node_<num>.<format> and return the file names.
+
+	The lines are decimated with minmax_indices() before they are sent to jobs worker processes.
+	"""
+	if np is None or Figure is None:
+		raise ImportError('NumPy and Matplotlib are required for graph rendering')
+	os.makedirs(directory, exist_ok=True)
+	doc = lambda a: getattr(ElasticReducedStressRecord, a).__doc__
+	tasks = []
+	for num in nodes:
+		table = manager_table.get(num)
+		if not table:
+			continue
+		x_values = table.column(x_name)
+		lines = []
+		for name in y_names:
+			y_values = table.column(name)
+			i = minmax_indices(y_values, max_points)
+			lines.append((x_values[i], y_values[i]))
+		tasks.append((os.path.join(directory, 'node_{}.{}'.format(num, format)), 'Узел {}'.format(num), doc(x_name), [doc(a) for a in y_names], lines))
+	if jobs > 1 and len(tasks) > 1:
+		with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+			return list(executor.map(_render_graph, *zip(*tasks)))
+	return [_render_graph(*a) for a in tasks]
+
+
+class DamageAnalytics():
+	"""Whole model statistics of the damage of the cycle types computed on flat NumPy columns.
+
+	nodes are node numbers, offsets are the starts of their cycle types in the damage column a
+	and one more offset for its end. expected is the damage of the nodes given by BaseMoments,
+	nan for a node absent in the node table.
+	Cycle types dropped by limit or max_rows are missing in the sums, so the cross-check needs an unbounded parse.
+	"""
+	THRESHOLDS = (1E-6, 1E-3, 0.1, 1.0)
+	FIELDS = ('node', 'damage', 'cycle_damage', 'cycle_types', 'dominant_share', 'mismatch')
+	def __init__(self, nodes, offsets, a, expected=None):
+		if np is None:
+			raise ImportError('NumPy is required for DamageAnalytics')
+		self._nodes = np.asarray(nodes, dtype=np.int64)
+		self._offsets = np.asarray(offsets, dtype=np.int64)
+		self._a = np.asarray(a, dtype=float)
+		self._expected = np.full(len(self._nodes), np.nan) if expected is None else np.asarray(expected, dtype=float)
+		self._totals = None
+		self._maximums = None
+
+	@staticmethod
+	def _expected_damage(node_table, nodes):
+		if node_table is None:
+			return None
+		if isinstance(node_table, NodeArrayTable):
+			nums, damages = node_table.column('num'), node_table.column('damage')
+		else:
+			nums = np.fromiter(node_table.keys(), dtype=np.int64, count=len(node_table))
+			damages = np.fromiter((i.damage for i in node_table.values()), dtype=float, count=len(node_table))
+		if not len(nums):
+			return np.full(len(nodes), np.nan)
+		order = np.argsort(nums, kind='stable')
+		nums, damages = nums[order], damages[order]
+		i = np.minimum(np.searchsorted(nums, nodes), len(nums) - 1)
+		return np.where(nums[i] == nodes, damages[i], np.nan)
+
+	@classmethod
+	def from_manager_table(cls, manager_table, node_table=None):
+		"""Analytics of the cycle types of a CycleTypeManagerTable of any backend, node_table is its node table by default"""
+		if node_table is None:
+			node_table = manager_table.node_table
+		nodes = np.fromiter(manager_table.keys(), dtype=np.int64, count=len(manager_table))
+		lengths = np.fromiter(map(len, manager_table.values()), dtype=np.int64, count=len(manager_table))
+		offsets = np.concatenate(((0,), np.cumsum(lengths)))
+		if manager_table.backend == 'array':
+			a = np.concatenate([i.data['a'] for i in manager_table.values()] or [np.empty(0)])
+		else:
+			a = np.fromiter((i.a for table in manager_table.values() for i in table), dtype=float, count=offsets[-1])
+		return cls(nodes, offsets, a, cls._expected_damage(node_table, nodes))
+
+	@classmethod
+	def from_store(cls, store, node_table=None):
+		"""Analytics of all cycle types of a ModelStore read from its mapped columns, node_table is the one of the store by default"""
+		if node_table is None:
+			node_table = store.node_table('array')
+		nodes, a, offsets = store.cycle_damage()
+		return cls(nodes, offsets, a, cls._expected_damage(node_table, nodes))
+
+	@property
+	def nodes(self):
+		return self._nodes
+
+	@property
+	def expected(self):
+		return self._expected
+
+	@property
+	def cycle_types(self):
+		return np.diff(self._offsets)
+
+	def _reduce(self, ufunc, empty):
+		# reduceat gives the value at the start of an empty range, it is replaced by empty
+		lengths = self.cycle_types
+		result = np.full(len(self._nodes), empty, dtype=float)
+		filled = lengths > 0
+		if filled.any():
+			result[filled] = ufunc.reduceat(self._a, self._offsets[:-1][filled])
+		return result
+
+	@property
+	def totals(self):
+		"""Summed damage of the cycle types of every node"""
+		if self._totals is None:
+			self._totals = self._reduce(np.add, 0.0)
+		return self._totals
+
+	@property
+	def dominant_share(self):
+		"""Share of the most damaging cycle type in the summed damage of every node, nan for zero damage"""
+		if self._maximums is None:
+			self._maximums = self._reduce(np.maximum, 0.0)
+		totals = self.totals
+		with np.errstate(invalid='ignore', divide='ignore'):
+			return np.where(totals > 0, self._maximums / totals, np.nan)
+
+	def mismatch(self, rtol=1E-3, atol=1E-12):
+		"""Mask of the nodes whose summed damage differs from BaseMoments, a node without BaseMoments damage is not a mismatch"""
+		expected = self._expected
+		return ~np.isnan(expected) & ~np.isclose(self.totals, expected, rtol=rtol, atol=atol)
+
+	def counts_above(self, thresholds=THRESHOLDS):
+		"""{threshold: number of nodes with a larger summed damage}"""
+		totals = np.sort(self.totals)
+		return {t: int(len(totals) - np.searchsorted(totals, t, side='right')) for t in thresholds}
+
+	def histogram(self, bins=20, per_cycle=False):
+		"""(counts, edges) of the decimal logarithm of the positive summed damage of the nodes or of the damage of every cycle type"""
+		values = self._a if per_cycle else self.totals
+		return np.histogram(np.log10(values[values > 0]), bins=bins)
+
+	def rows(self, rtol=1E-3, atol=1E-12):
+		"""Tuples of FIELDS for every node"""
+		return zip(self._nodes.tolist(), self._expected.tolist(), self.totals.tolist(), self.cycle_types.tolist(),
+		           self.dominant_share.tolist(), self.mismatch(rtol, atol).tolist())
+
+	def save(self, file, rtol=1E-3, atol=1E-12):
+		with open(file, mode='w', newline='', buffering=EXPORT_BUFFER_SIZE) as f:
+			writer = csv.writer(f)
+			writer.writerow(self.FIELDS)
+			writer.writerows(self.rows(rtol, atol))
+
+	def print_summary(self, rtol=1E-3, atol=1E-12, bins=10, limit=10):
+		totals = self.totals
+		mismatch = self.mismatch(rtol, atol)
+		print('nodes {}, cycle types {}, summed damage max {:.5e}, mean {:.5e}'.format(len(totals), len(self._a), totals.max(initial=0.0), totals.mean() if len(totals) else 0.0))
+		for t, count in self.counts_above().items():
+			print('nodes with damage above {:g}: {}'.format(t, count))
+		share = self.dominant_share
+		share = share[~np.isnan(share)]
+		if len(share):
+			print('dominant cycle type share median {:.3f}, min {:.3f}'.format(np.median(share), share.min()))
+		counts, edges = self.histogram(bins) if (totals > 0).any() else ((), ())
+		for count, low, high in zip(list(counts), list(edges[:-1]), list(edges[1:])):
+			print('lg(damage) {:>7.2f} .. {:>7.2f}: {}'.format(low, high, count))
+		if mismatch.any():
+			print('WARNING: summed damage of {} nodes differs from BaseMoments by more than rtol={:g}'.format(int(mismatch.sum()), rtol))
+			for i in np.flatnonzero(mismatch)[:limit].tolist():
+				print('node {}: BaseMoments {:.5e}, cycle types {:.5e}'.format(int(self._nodes[i]), self._expected[i], totals[i]))
+
+
+CYCLE_TYPE_COLUMNS = (("Тип цикла", 12,   'General'),
+                      ("σFmax",     8.25, '0'),
+                      ("σFmin",     8.25, '0'),
+                      ("σaF",       8.25, '0'),
+                      ("Tmin",      8.25, '0'),
+                      ("Tmax",      8.25, '0'),
+                      ("r",         8,    '0.00'),
+                      ("[N]",       11,   '0'),
+                      ("N",         9,    '0.0'),
+                      ("a",         10,   '0.0E+0'))
+
+
+def cycle_type_rows(manager_table, node, limit=1E-8, is_expanded=True, additional=False, mlen=None):
+	"""Yield the rows of the types of cycle of node with damage above limit in the order of CYCLE_TYPE_COLUMNS
+
+	With is_expanded the ids of the records of expanded history are replaced by the real ids
+	of the moments of time (both of them are shown with additional).
+	"""
+	if mlen is None:
+		mlen = manager_table.local_reduced_stress_manager_table.length_of_tables
+	for item in manager_table[node].above(limit):
+		if is_expanded and (item.first_id > mlen or item.second_id > mlen):
+			new_first_id = manager_table.elastic_reduced_stress_manager_table[node].search_real_id(item.sfmax)
+			new_second_id = manager_table.elastic_reduced_stress_manager_table[node].search_real_id(item.sfmin)
+			if additional and new_first_id and new_second_id:
+				cycle_type = "{}-{} ({}-{})".format(item.first_id, item.second_id, new_first_id, new_second_id)
+			else:
+				cycle_type = "{}-{}".format(new_first_id, new_second_id)
+		else:
+			cycle_type = "{}-{}".format(item.first_id, item.second_id)
+		yield (cycle_type, item.sfmax, item.sfmin, item.saf, item.tmin, item.tmax, item.r, item.ndop, item.n, item.a)
+
+
+def save_in_workbook(manager_table, necessary_nodes=None, worksheet_name='ma', limit=1E-8, is_expanded=True, additional =False, write_only=None, node_rows=None):
+	"""write_only streams the rows of every sheet into the file with named styles registered once,
+	by default it is used with openpyxl 3 and gives the same workbook as the in-memory one.
+	node_rows {node: rows} are the rows of cycle_type_rows made before, e.g. in watch mode.
+	"""
+	if write_only is None:
+		write_only = openpyxl.__version__[0] == '3'
+	mb = openpyxl.Workbook(write_only=write_only)
+	chwidth = tuple((chvalue, cwidth) for chvalue, cwidth, cformat in CYCLE_TYPE_COLUMNS)
 	font = Font(name='Times New Roman', size=12)
 	thin_border = Border(left=Side(style='thin'),
                      right=Side(style='thin'),
@@ -735,84 +3114,108 @@ def save_in_workbook(manager_table, necessary_nodes=None, worksheet_name='ma', l
 	if necessary_nodes is None:
 		necessary_nodes = manager_table.keys()
 	mlen = manager_table.local_reduced_stress_manager_table.length_of_tables
-	for node in necessary_nodes:
-		is_empty = True
-		sheet_name = '{}n'.format(node)
-		ms = mb.create_sheet(sheet_name)
-		ct = manager_table[node]
-		for rownum, item in enumerate(filter(lambda a: a.a > limit, ct), 2):
-			if is_expanded and (item.first_id > mlen or item.second_id > mlen):
-				new_first_id = manager_table.elastic_reduced_stress_manager_table[node].search_real_id(item.sfmax)
-				new_second_id = manager_table.elastic_reduced_stress_manager_table[node].search_real_id(item.sfmin)
-				if additional and new_first_id and new_second_id:	
-					ms.cell(row=rownum, column=1).value = "{}-{} ({}-{})".format(item.first_id, item.second_id, new_first_id, new_second_id)
-				else:
-					ms.cell(row=rownum, column=1).value = "{}-{}".format(new_first_id, new_second_id)
-				new_first_id = None
-				new_second_id = None
-			else:
-				ms.cell(row=rownum, column=1).value = "{}-{}".format(item.first_id, item.second_id)
-			ms.cell(row=rownum, column=2).value = item.sfmax   
-			ms.cell(row=rownum, column=3).value = item.sfmin
-			ms.cell(row=rownum, column=4).value = item.saf
-			ms.cell(row=rownum, column=5).value = item.tmin
-			ms.cell(row=rownum, column=6).value = item.tmax
-			ms.cell(row=rownum, column=7).value = item.r
-			ms.cell(row=rownum, column=8).value = item.ndop
-			ms.cell(row=rownum, column=9).value = item.n
-			ms.cell(row=rownum, column=10).value = item.a
-			is_empty = False
-		if manager_table.node_table[node].damage >= 1.0:
-			ms.sheet_properties.tabColor = openpyxl.styles.colors.Color('FF0000')
-		if not is_empty:
-			if openpyxl.__version__[0] == '3':
-				for cnum, (chvalue, cwidth) in enumerate(chwidth, 1):
-					hcell = ms.cell(row=1, column=cnum)
-					hcell.value = chvalue
-					ms.column_dimensions[hcell.column_letter].width = cwidth
-				ms.cell(row=rownum+1, column=10).value = "=SUM(J2:J{})".format(rownum)
-				mc = ms.merge_cells(start_row=rownum+1, start_column=1, end_row=rownum+1, end_column=9)
-				ms.cell(row=rownum+1, column=1).value = "Итоговая накопленная усталостная поврежденность"
-				ms.cell(row=rownum+1, column=1).border = thin_border
-				ms.cell(row=rownum+1, column=1).alignment = cent_alignment
-				ms.cell(row=rownum+1, column=1).font = font
-				ms.cell(row=rownum+1, column=10).border = thin_border
-				ms.cell(row=rownum+1, column=10).alignment = cent_alignment
-				ms.cell(row=rownum+1, column=10).font = font
-				for row in ms['A1:J{}'.format(rownum)]:
-					for cell in row:
-						cell.border = thin_border
-						cell.alignment = cent_alignment
-						cell.font = font
-						if cell.column_letter in 'BCDEFH':
-							cell.number_format = '0'
-						elif cell.column_letter == 'G':
-							cell.number_format = '0.00'
-						elif cell.column_letter == 'I':
-							cell.number_format = '0.0'
-						elif cell.column_letter == 'J':
-							cell.number_format = '0.0E+0'
-			elif openpyxl.__version__[0] == '2':
-				for cnum, (chvalue, cwidth) in enumerate(chwidth, 1):
-					hcell = ms.cell(row=1, column=cnum)
-					hcell.value = chvalue
-					ms.column_dimensions[hcell.column].width = cwidth
-				ms.cell(row=rownum+1, column=10).value = "=SUM(J2:J{})".format(rownum)
-				ms.merge_cells(start_row=rownum+1, start_column=1, end_row=rownum+1, end_column=9)
-				ms.cell(row=rownum+1, column=1).value = "Итоговая накопленная усталостная поврежденность"
-				for row in ms['A1:J{}'.format(rownum+1)]:
-					for cell in row:
-						cell.border = thin_border
-						cell.alignment = cent_alignment
-						cell.font = font
-						if cell.column in 'BCDEFH':
-							cell.number_format = '0'
-						elif cell.column == 'G':
-							cell.number_format = '0.00'
-						elif cell.column == 'I':
-							cell.number_format = '0.0'
-						elif cell.column == 'J':
-							cell.number_format = '0.0E+0'
+	if write_only:
+		# the in-memory workbook always has the default sheet
+		mb.create_sheet('Sheet')
+		styles = []
+		for chvalue, cwidth, cformat in CYCLE_TYPE_COLUMNS:
+			style_name = 'canal {}'.format(cformat)
+			if style_name not in mb.named_styles:
+				mb.add_named_style(NamedStyle(name=style_name, font=font, border=thin_border, alignment=cent_alignment, number_format=cformat))
+			styles.append(style_name)
+		def styled_cells(ms, styles):
+			cells = []
+			for style in styles:
+				cell = None
+				if style is not None:
+					cell = WriteOnlyCell(ms)
+					cell.style = style
+				cells.append(cell)
+			return cells
+		def styled_row(cells, values):
+			# rows of a write-only sheet are serialized by append, so the cells are reused
+			for cell, value in zip(cells, values):
+				if cell is not None:
+					cell.value = value
+			return cells
+		footer_styles = [styles[0]] + [None] * 8 + [styles[0]]
+		for node in necessary_nodes:
+			ms = mb.create_sheet('{}n'.format(node))
+			# sheet properties and columns are written before the first row
+			if manager_table.node_table[node].damage >= 1.0:
+				ms.sheet_properties.tabColor = openpyxl.styles.colors.Color('FF0000')
+			rows = iter(node_rows[node]) if node_rows is not None else cycle_type_rows(manager_table, node, limit, is_expanded, additional, mlen)
+			first_row = next(rows, None)
+			if first_row is None:
+				continue
+			for cnum, (chvalue, cwidth) in enumerate(chwidth, 1):
+				ms.column_dimensions[get_column_letter(cnum)].width = cwidth
+			cells = styled_cells(ms, styles)
+			ms.append(styled_row(cells, (chvalue for chvalue, cwidth in chwidth)))
+			for rownum, row in enumerate(itertools.chain((first_row,), rows), 2):
+				ms.append(styled_row(cells, row))
+			ms.merged_cells.add('A{0}:I{0}'.format(rownum+1))
+			ms.append(styled_row(styled_cells(ms, footer_styles), ["Итоговая накопленная усталостная поврежденность"] + [None] * 8 + ["=SUM(J2:J{})".format(rownum)]))
+	else:
+		for node in necessary_nodes:
+			is_empty = True
+			sheet_name = '{}n'.format(node)
+			ms = mb.create_sheet(sheet_name)
+			for rownum, row in enumerate(node_rows[node] if node_rows is not None else cycle_type_rows(manager_table, node, limit, is_expanded, additional, mlen), 2):
+				for cnum, value in enumerate(row, 1):
+					ms.cell(row=rownum, column=cnum).value = value
+				is_empty = False
+			if manager_table.node_table[node].damage >= 1.0:
+				ms.sheet_properties.tabColor = openpyxl.styles.colors.Color('FF0000')
+			if not is_empty:
+				if openpyxl.__version__[0] == '3':
+					for cnum, (chvalue, cwidth) in enumerate(chwidth, 1):
+						hcell = ms.cell(row=1, column=cnum)
+						hcell.value = chvalue
+						ms.column_dimensions[hcell.column_letter].width = cwidth
+					ms.cell(row=rownum+1, column=10).value = "=SUM(J2:J{})".format(rownum)
+					mc = ms.merge_cells(start_row=rownum+1, start_column=1, end_row=rownum+1, end_column=9)
+					ms.cell(row=rownum+1, column=1).value = "Итоговая накопленная усталостная поврежденность"
+					ms.cell(row=rownum+1, column=1).border = thin_border
+					ms.cell(row=rownum+1, column=1).alignment = cent_alignment
+					ms.cell(row=rownum+1, column=1).font = font
+					ms.cell(row=rownum+1, column=10).border = thin_border
+					ms.cell(row=rownum+1, column=10).alignment = cent_alignment
+					ms.cell(row=rownum+1, column=10).font = font
+					for row in ms['A1:J{}'.format(rownum)]:
+						for cell in row:
+							cell.border = thin_border
+							cell.alignment = cent_alignment
+							cell.font = font
+							if cell.column_letter in 'BCDEFH':
+								cell.number_format = '0'
+							elif cell.column_letter == 'G':
+								cell.number_format = '0.00'
+							elif cell.column_letter == 'I':
+								cell.number_format = '0.0'
+							elif cell.column_letter == 'J':
+								cell.number_format = '0.0E+0'
+				elif openpyxl.__version__[0] == '2':
+					for cnum, (chvalue, cwidth) in enumerate(chwidth, 1):
+						hcell = ms.cell(row=1, column=cnum)
+						hcell.value = chvalue
+						ms.column_dimensions[hcell.column].width = cwidth
+					ms.cell(row=rownum+1, column=10).value = "=SUM(J2:J{})".format(rownum)
+					ms.merge_cells(start_row=rownum+1, start_column=1, end_row=rownum+1, end_column=9)
+					ms.cell(row=rownum+1, column=1).value = "Итоговая накопленная усталостная поврежденность"
+					for row in ms['A1:J{}'.format(rownum+1)]:
+						for cell in row:
+							cell.border = thin_border
+							cell.alignment = cent_alignment
+							cell.font = font
+							if cell.column in 'BCDEFH':
+								cell.number_format = '0'
+							elif cell.column == 'G':
+								cell.number_format = '0.00'
+							elif cell.column == 'I':
+								cell.number_format = '0.0'
+							elif cell.column == 'J':
+								cell.number_format = '0.0E+0'
 	try:
 		mb.save("{}".format(worksheet_name))
 	except PermissionError:
@@ -821,33 +3224,531 @@ def save_in_workbook(manager_table, necessary_nodes=None, worksheet_name='ma', l
 
 
 
-def main():
-	args = parse_args(sys.argv[1:])
+CYCLE_TYPE_FIELDS = ('node', 'cycle_type', 'sfmax', 'sfmin', 'saf', 'tmin', 'tmax', 'r', 'ndop', 'n', 'a')
+EXPORT_BUFFER_SIZE = 1 << 20
+
+
+def cycle_type_long_rows(manager_table, necessary_nodes=None, limit=1E-8, is_expanded=True, additional=False, node_rows=None):
+	"""Yield the rows of cycle_type_rows of all nodes as one long table in the order of CYCLE_TYPE_FIELDS"""
+	if necessary_nodes is None:
+		necessary_nodes = manager_table.keys()
+	mlen = manager_table.local_reduced_stress_manager_table.length_of_tables
+	for node in necessary_nodes:
+		for row in node_rows[node] if node_rows is not None else cycle_type_rows(manager_table, node, limit, is_expanded, additional, mlen):
+			yield (node,) + row
+
+
+def save_in_csv(manager_table, necessary_nodes=None, file='table.csv', limit=1E-8, is_expanded=True, additional=False, node_rows=None):
+	try:
+		with open(file, 'w', newline='', encoding='utf-8', buffering=EXPORT_BUFFER_SIZE) as f:
+			writer = csv.writer(f)
+			writer.writerow(CYCLE_TYPE_FIELDS)
+			writer.writerows(cycle_type_long_rows(manager_table, necessary_nodes, limit, is_expanded, additional, node_rows))
+	except PermissionError:
+		print('ERROR: Please close the csv file')
+
+
+def save_in_jsonl(manager_table, necessary_nodes=None, file='table.jsonl', limit=1E-8, is_expanded=True, additional=False, node_rows=None):
+	try:
+		with open(file, 'w', encoding='utf-8', buffering=EXPORT_BUFFER_SIZE) as f:
+			f.writelines(json.dumps(dict(zip(CYCLE_TYPE_FIELDS, row)), ensure_ascii=False) + '\n' for row in cycle_type_long_rows(manager_table, necessary_nodes, limit, is_expanded, additional, node_rows))
+	except PermissionError:
+		print('ERROR: Please close the jsonl file')
+
+
+def save_in_parquet(manager_table, necessary_nodes=None, file='table.parquet', limit=1E-8, is_expanded=True, additional=False, node_rows=None, batch_size=65536):
+	"""Rows are written in row groups of batch_size rows"""
+	if pa is None:
+		raise ImportError('pyarrow is required for the parquet format')
+	schema = pa.schema([('node', pa.int64()), ('cycle_type', pa.string())] + [(name, pa.float64()) for name in CYCLE_TYPE_FIELDS[2:]])
+	rows = cycle_type_long_rows(manager_table, necessary_nodes, limit, is_expanded, additional, node_rows)
+	try:
+		with pq.ParquetWriter(file, schema) as writer:
+			while True:
+				batch = list(itertools.islice(rows, batch_size))
+				if not batch:
+					break
+				columns = [pa.array(column, type=field.type) for column, field in zip(zip(*batch), schema)]
+				writer.write_table(pa.Table.from_arrays(columns, schema=schema))
+	except PermissionError:
+		print('ERROR: Please close the parquet file')
+
+
+SAVERS = {'xlsx': save_in_workbook,
+          'csv': save_in_csv,
+          'parquet': save_in_parquet,
+          'jsonl': save_in_jsonl}
+
+
+class PhaseProfiler():
+	"""Wall time, CPU time, input size, allocated objects and peak memory of the phases of a run.
+
+	A phase is measured with `with profiler.phase(name, file) as stats:`, stats['rows'] and stats['read_bytes'] may be set inside.
+	file is the size of the input files of the phase on disk, read is the part of them consumed by the parsers
+	which use an index or stop after the selected nodes, with the parse cache the bytes of the cache entries read.
+	objects is the change of the number of memory blocks allocated by Python, rss is the peak RSS
+	of the process so far and traced is the peak of tracemalloc within the phase (with trace_memory only).
+	Phases named in cprofile run under cProfile, their stats are saved in profile-<phase>.prof.
+	A disabled profiler measures nothing.
+	"""
+	OUTPUT_HEADER = 'phase                 wall, s  cpu, s  file, MB  read, MB       rows    objects  rss, MB  traced, MB'
+	def __init__(self, enabled=True, trace_memory=False, cprofile=()):
+		self._enabled = enabled
+		self._trace_memory = enabled and trace_memory
+		self._cprofile = set(cprofile) if enabled else set()
+		self._phases = []
+		if self._trace_memory and not tracemalloc.is_tracing():
+			tracemalloc.start()
+
+	@property
+	def enabled(self):
+		return self._enabled
+
+	@property
+	def phases(self):
+		return self._phases
+
+	@staticmethod
+	def _cpu_time():
+		t = os.times()
+		return t.user + t.system + t.children_user + t.children_system
+
+	@contextlib.contextmanager
+	def phase(self, name, *files):
+		stats = {'phase': name}
+		if not self._enabled:
+			yield stats
+			return
+		profile = cProfile.Profile() if name in self._cprofile else None
+		if self._trace_memory:
+			tracemalloc.reset_peak()
+		blocks = sys.getallocatedblocks()
+		cpu = self._cpu_time()
+		wall = time.perf_counter()
+		if profile is not None:
+			profile.enable()
+		try:
+			yield stats
+		finally:
+			if profile is not None:
+				profile.disable()
+			stats['wall'] = time.perf_counter() - wall
+			stats['cpu'] = self._cpu_time() - cpu
+			stats['objects'] = sys.getallocatedblocks() - blocks
+			stats['traced'] = tracemalloc.get_traced_memory()[1] if self._trace_memory else None
+			# ru_maxrss is in kilobytes on Linux
+			stats['rss'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024 if resource is not None else None
+			stats['file_bytes'] = sum(map(os.path.getsize, files))
+			if profile is not None:
+				stats['cprofile'] = 'profile-{}.prof'.format(name)
+				profile.dump_stats(stats['cprofile'])
+			self._phases.append(stats)
+
+	def print_table(self):
+		print(self.OUTPUT_HEADER)
+		mb = lambda a: '-' if a is None else '{:.1f}'.format(a / 2**20)
+		for i in self._phases:
+			print('{:<20}{:>9.3f}{:>8.3f}{:>10}{:>10}{:>11}{:>11}{:>9}{:>12}'.format(i['phase'], i['wall'], i['cpu'], mb(i['file_bytes']) if i['file_bytes'] else '-',
+			      mb(i.get('read_bytes')), i.get('rows', '-'), i['objects'], mb(i['rss']), mb(i['traced'])))
+		for i in self._phases:
+			if 'cprofile' in i:
+				print('\ncProfile of {} is saved in {}'.format(i['phase'], i['cprofile']))
+				pstats.Stats(i['cprofile']).sort_stats('cumulative').print_stats(15)
+
+	def save(self, file):
+		with open(file, mode='w') as f:
+			json.dump(self._phases, f, indent=1)
+
+
+def _parse_report(manager_type, file, compact_node_table, nodes, use_index, backend='list', **kwargs):
+	"""Worker of main(): parse one report against a copy of the node table and return its compact form
+	with the number of bytes read"""
+	nt = NodeTable.from_compact(compact_node_table)
+	if manager_type is LocalReducedStressManagerTable:
+		mt = manager_type(nt, backend)
+		parse = mt.parse_local_redused_stress_file
+	elif manager_type is ElasticReducedStressManagerTable:
+		mt = manager_type(nt, None, backend)
+		parse = mt.parse_elastic_reduced_stress_file
+	else:
+		mt = manager_type(nt, None, None, backend)
+		parse = mt.parse_accumulated_fatigue_damage_file
+	parse(file, nodes=nodes, index=mt.open_index(file) if use_index else None, **kwargs)
+	return mt.to_compact(), mt.read_bytes
+
+
+def _parse_accumulated_fatigue_damage_range(file, compact_node_table, nodes, start, end, backend='list', limit=None, max_rows=None, index=None):
+	"""Worker of CycleTypeManagerTable: parse the node blocks in the byte range [start, end) of the report
+	or the nodes of a part of its index, return the compact form with the number of bytes read"""
+	nt = NodeTable.from_compact(compact_node_table)
+	ctt = CycleTypeManagerTable(nt, None, None, backend)
+	ctt._parse_scanned(file, nodes, index, start, end, limit=limit, max_rows=max_rows)
+	return ctt.to_compact(), ctt.read_bytes
+
+
+def newest_file(prefix, directory=None):
+	names = [a for a in os.listdir(directory) if a.startswith(prefix)]
+	if not names:
+		raise ValueError('file {}* is not found in {}'.format(prefix, directory or os.getcwd()))
+	if directory is not None:
+		names = [os.path.join(directory, a) for a in names]
+	return max(names, key=os.path.getctime)
+
+
+def _parse_reports(args, nt, bfile, nodes, limit=None, max_rows=None, profiler=None, directory=None):
+	"""Parse the newest reports of the directory (the current one by default) as main() is configured by args"""
+	if profiler is None:
+		profiler = PhaseProfiler(False)
+	with profiler.phase('report_discovery'):
+		lfile = newest_file('Report (Local Reduced Stress)', directory)
+		efile = newest_file('Report (Elastic Reduced Stress)', directory)
+		cfile = newest_file('Report (Accumulated Fatigue Damage)', directory)
+	lmt = LocalReducedStressManagerTable(nt, args.backend)
+	emt = ElasticReducedStressManagerTable(nt, lmt, args.backend)
+	ctt = CycleTypeManagerTable(nt, lmt, emt, args.backend)
+	rows = lambda mt: sum(map(len, mt.values()))
+	if args.cache:
+		cache = ParseCache(args.cache, args.cache_size << 20)
+		# the cache keeps whole reports, the selected nodes are taken from them
+		with profiler.phase('local', lfile) as stats:
+			cache_bytes = cache.read_bytes
+			cache.load_manager_table(lmt, lambda f: lmt.parse_local_redused_stress_file(f, index=lmt.open_index(f) if args.index else None), lfile, (bfile,), nodes)
+			stats['rows'] = rows(lmt)
+			stats['read_bytes'] = cache.read_bytes - cache_bytes + lmt.read_bytes
+		with profiler.phase('elastic', efile) as stats:
+			cache_bytes = cache.read_bytes
+			cache.load_manager_table(emt, lambda f: emt.parse_elastic_reduced_stress_file(f, index=emt.open_index(f) if args.index else None), efile, (bfile,), nodes)
+			stats['rows'] = rows(emt)
+			stats['read_bytes'] = cache.read_bytes - cache_bytes + emt.read_bytes
+		with profiler.phase('cycles', cfile) as stats:
+			cache_bytes = cache.read_bytes
+			cache.load_manager_table(ctt, lambda f: ctt.parse_accumulated_fatigue_damage_file(f, index=ctt.open_index(f) if args.index else None, jobs=args.jobs), cfile, (bfile,), nodes,
+			                         lambda records: ctt.bound_records(records, limit, max_rows))
+			stats['rows'] = rows(ctt)
+			stats['read_bytes'] = cache.read_bytes - cache_bytes + ctt.read_bytes
+	elif args.jobs > 1:
+		with profiler.phase('reports', lfile, efile, cfile) as stats:
+			compact_node_table = nt.to_compact(nodes)
+			with concurrent.futures.ProcessPoolExecutor(max_workers=args.jobs) as executor:
+				futures = [(mt, executor.submit(_parse_report, type(mt), file, compact_node_table, nodes, args.index, args.backend)) for mt, file in ((lmt, lfile), (emt, efile))]
+				# the largest report is split between all workers of the pool
+				ctt.parse_accumulated_fatigue_damage_file(cfile, nodes=nodes, index=ctt.open_index(cfile) if args.index else None, jobs=args.jobs, executor=executor, limit=limit, max_rows=max_rows)
+				for mt, future in futures:
+					mt.load_compact(*future.result())
+			stats['rows'] = rows(lmt) + rows(emt) + rows(ctt)
+			stats['read_bytes'] = lmt.read_bytes + emt.read_bytes + ctt.read_bytes
+	else:
+		with profiler.phase('local', lfile) as stats:
+			lmt.parse_local_redused_stress_file(lfile, nodes=nodes, index=lmt.open_index(lfile) if args.index else None)
+			stats['rows'] = rows(lmt)
+			stats['read_bytes'] = lmt.read_bytes
+		with profiler.phase('elastic', efile) as stats:
+			emt.parse_elastic_reduced_stress_file(efile, nodes=nodes, index=emt.open_index(efile) if args.index else None)
+			stats['rows'] = rows(emt)
+			stats['read_bytes'] = emt.read_bytes
+		with profiler.phase('cycles', cfile) as stats:
+			ctt.parse_accumulated_fatigue_damage_file(cfile, nodes=nodes, index=ctt.open_index(cfile) if args.index else None, limit=limit, max_rows=max_rows)
+			stats['rows'] = rows(ctt)
+			stats['read_bytes'] = ctt.read_bytes
+	return lmt, emt, ctt
+
+
+def _select_nodes(args, nt):
+	"""Print the node table and return the numbers of the nodes selected with -n or -l"""
 	if not args.l:
 		nnodes = args.n
 	else:
 		nnodes = None
-	nt = NodeTable()
-	nt.parse_base_moments(max(list(filter(lambda a: a.startswith('BaseMoments'), os.listdir())), key=os.path.getctime))
 	if nnodes:
 		nt.print_table(sort_by_damage=True, limit=nnodes)
 	else:
-		nt.print_table_by_list(args.l)
-	lmt = LocalReducedStressManagerTable(nt)
-	lmt.parse_local_redused_stress_file(max(list(filter(lambda a: a.startswith('Report (Local Reduced Stress)'), os.listdir())), key=os.path.getctime))
-	
-	emt = ElasticReducedStressManagerTable(nt, lmt)
-	emt.parse_elastic_reduced_stress_file(max(list(filter(lambda a: a.startswith('Report (Elastic Reduced Stress)'), os.listdir())), key=os.path.getctime))
-	
-	ctt = CycleTypeManagerTable(nt, lmt, emt)
-	ctt.parse_accumulated_fatigue_damage_file(max(list(filter(lambda a: a.startswith('Report (Accumulated Fatigue Damage)'), os.listdir())), key=os.path.getctime))
+		for i in args.l:
+			if i not in nt:
+				print('WARNING: node {} is not found in BaseMoments'.format(i))
+		nt.print_table_by_list([i for i in args.l if i in nt])
 	if nnodes:
-		nn = list(map(lambda a: a.num, nt.get_damage_index(nnodes)))
+		return list(map(lambda a: a.num, nt.get_damage_index(nnodes)))
+	else:
+		return [i for i in args.l if i in nt]
+
+
+def _watch(args):
+	"""Save the output every time the reports grow, only new node blocks are parsed
+	and only the rows of the nodes of the parsed blocks are made again.
+
+	Everything is parsed again when BaseMoments changes or newer reports appear.
+	"""
+	is_expanded = args.c or args.a
+	outfile = args.outfile or 'table.{}'.format(args.format)
+	files = None
+	while True:
+		try:
+			current_files = tuple(newest_file(prefix) for prefix in ('BaseMoments', 'Report (Local Reduced Stress)', 'Report (Elastic Reduced Stress)', 'Report (Accumulated Fatigue Damage)'))
+			bstamp = ReportIndex._stamp(current_files[0])
+			if any(compression(i) for i in current_files[1:]):
+				print("ERROR: --watch doesn't read compressed reports")
+				return
+		except (ValueError, OSError):
+			print('Waiting for the reports')
+			time.sleep(args.watch)
+			continue
+		if (current_files, bstamp) != files:
+			files = (current_files, bstamp)
+			bfile, lfile, efile, cfile = current_files
+			nt = node_table_type(args.backend)()
+			nt.parse_base_moments(bfile)
+			nn = _select_nodes(args, nt)
+			nodes = set(nn)
+			lmt = LocalReducedStressManagerTable(nt, args.backend)
+			emt = ElasticReducedStressManagerTable(nt, lmt, args.backend)
+			ctt = CycleTypeManagerTable(nt, lmt, emt, args.backend)
+			tails = (ReportTail(lmt.scanner(lfile), lambda start, end: lmt._parse_scanned(lfile, nodes, None, start, end)),
+			         ReportTail(emt.scanner(efile), lambda start, end: emt._parse_scanned(efile, nodes, None, start, end)),
+			         ReportTail(ctt.scanner(cfile), lambda start, end: ctt._parse_scanned(cfile, nodes, None, start, end, limit=args.limit, max_rows=args.max_rows)))
+			node_rows = {}
+			mlen = None
+		try:
+			affected = set()
+			for tail in tails:
+				affected |= tail.update()
+		except (ValueError, OSError) as e:
+			print('WARNING: {}, the reports are read again'.format(e))
+			files = None
+			continue
+		if lmt.length_of_tables != mlen:
+			# history expansion of every node depends on the length of local tables
+			mlen = lmt.length_of_tables
+			node_rows.clear()
+		for node in affected:
+			node_rows.pop(node, None)
+			if node in emt:
+				emt[node].reset_expansion_index()
+		ready = [i for i in nn if i in ctt and (not is_expanded or (i in lmt and i in emt))]
+		updated = [i for i in ready if i not in node_rows]
+		if updated:
+			for node in updated:
+				node_rows[node] = list(cycle_type_rows(ctt, node, args.limit, is_expanded, args.a, mlen))
+			SAVERS[args.format](ctt, ready, outfile, args.limit, is_expanded, args.a, node_rows=node_rows)
+			print('{} of {} nodes are saved in {}, updated: {}'.format(len(ready), len(nn), outfile, ' '.join(map(str, updated))))
+		time.sleep(args.watch)
+
+
+def _damage_analytics(args, nt, store=None, directory=None, ctt=None):
+	"""DamageAnalytics of all nodes of the store, of ctt with all nodes of the cycle report
+	or of an unbounded array backend parse of the newest cycle report (through --cache when given)"""
+	if store is not None:
+		return DamageAnalytics.from_store(store, nt)
+	if ctt is not None:
+		return DamageAnalytics.from_manager_table(ctt, nt)
+	cfile = newest_file('Report (Accumulated Fatigue Damage)', directory)
+	ctt = CycleTypeManagerTable(nt, None, None, 'array')
+	parse = lambda f: ctt.parse_accumulated_fatigue_damage_file(f, index=ctt.open_index(f) if args.index else None, jobs=args.jobs)
+	if args.cache:
+		# the same entry as the full parse of _parse_reports()
+		ParseCache(args.cache, args.cache_size << 20).load_manager_table(ctt, parse, cfile, (newest_file('BaseMoments', directory),))
+	else:
+		parse(cfile)
+	return DamageAnalytics.from_manager_table(ctt, nt)
+
+
+def _query(args):
+	"""query command of main(): print the selected rows as csv"""
+	try:
+		with SQLiteStore(args.database) as database:
+			if args.sql:
+				cursor = database.execute(args.sql)
+				columns = [a[0] for a in cursor.description or ()]
+				rows = cursor.fetchall() if args.rows is None else cursor.fetchmany(args.rows)
+			elif args.cycles or args.saf_above is not None or args.nodes:
+				columns = database.CYCLE_COLUMNS
+				rows = database.cycle_types(args.saf_above, args.damage_above, args.component, args.moment, args.nodes, args.rows)
+			else:
+				columns = database.NODE_COLUMNS
+				rows = database.nodes(args.damage_above, args.component, args.moment, args.rows)
+	except (ValueError, sqlite3.Error) as e:
+		print('ERROR: {}'.format(e))
+		return
+	writer = csv.writer(sys.stdout, lineterminator='\n')
+	writer.writerow(columns)
+	writer.writerows(rows)
+
+
+def _run(args, directory=None, profiler=None):
+	"""Run the pipeline of main() for the newest files of the directory (the current one by default).
+
+	--outfile, --compile and --store are relative to the directory. Return the node table,
+	the selected nodes and the cycle type manager table.
+	"""
+	if profiler is None:
+		profiler = PhaseProfiler(False)
+	path = (lambda a: os.path.join(directory, a)) if directory is not None else (lambda a: a)
+	with profiler.phase('discovery'):
+		bfile = None if args.store else newest_file('BaseMoments', directory)
+	with profiler.phase('base_moments', *(() if args.store else (bfile,))) as stats:
+		if args.store:
+			store = ModelStore(path(args.store))
+			nt = store.node_table(args.backend)
+		elif args.cache:
+			cache = ParseCache(args.cache, args.cache_size << 20)
+			nt = cache.load_node_table(bfile, args.backend)
+			stats['read_bytes'] = cache.read_bytes
+		else:
+			nt = node_table_type(args.backend)()
+			nt.parse_base_moments(bfile)
+			# BaseMoments is read as a whole
+			stats['read_bytes'] = os.path.getsize(bfile)
+		stats['rows'] = len(nt)
+	nn = _select_nodes(args, nt)
+	# only the selected nodes are read from the reports
+	nodes = set(nn)
+	parsed = None
+	if args.store:
+		if args.sqlite:
+			with profiler.phase('sqlite'):
+				SQLiteStore.compile(path(args.sqlite), nt, *store.manager_tables(nt)).close()
+		with profiler.phase('store'):
+			lmt, emt, ctt = store.manager_tables(nt, nodes, args.limit, args.max_rows, args.backend)
+	elif args.compile or args.sqlite:
+		# the stores keep whole reports, the selected nodes are taken from them
+		parsed = _parse_reports(args, nt, bfile, None, profiler=profiler, directory=directory)
+		if args.sqlite:
+			with profiler.phase('sqlite'):
+				database = SQLiteStore.compile(path(args.sqlite), nt, *parsed)
+				if not args.compile:
+					lmt, emt, ctt = database.manager_tables(nt, nodes, args.limit, args.max_rows, args.backend)
+				database.close()
+		if args.compile:
+			with profiler.phase('compile'):
+				store = ModelStore.compile(path(args.compile), nt, *parsed)
+				lmt, emt, ctt = store.manager_tables(nt, nodes, args.limit, args.max_rows, args.backend)
 	else:
-		nn = args.l
-	save_in_workbook(ctt, nn, args.outfile, args.limit, args.c or args.a, args.a)
+		lmt, emt, ctt = _parse_reports(args, nt, bfile, nodes, args.limit, args.max_rows, profiler, directory)
+	outfile = path(args.outfile or 'table.{}'.format(args.format))
+	is_expanded = args.c or args.a
+	node_rows = None
+	if profiler.enabled:
+		# the rows are made before the output to measure history expansion apart from writing
+		with profiler.phase('history_expansion') as stats:
+			mlen = lmt.length_of_tables
+			node_rows = {node: list(cycle_type_rows(ctt, node, args.limit, is_expanded, args.a, mlen)) for node in nn}
+			stats['rows'] = sum(map(len, node_rows.values()))
+	with profiler.phase('save') as stats:
+		SAVERS[args.format](ctt, nn, outfile, args.limit, is_expanded, args.a, node_rows=node_rows)
+	if args.analytics:
+		with profiler.phase('analytics') as stats:
+			# a full parse of the stores is used again
+			analytics = _damage_analytics(args, nt, store if args.store or args.compile else None, directory, parsed[2] if parsed is not None else None)
+			analytics.save(path(args.analytics), args.analytics_rtol)
+			analytics.print_summary(args.analytics_rtol)
+			stats['rows'] = len(analytics.nodes)
+	if args.plot:
+		with profiler.phase('plot') as stats:
+			# the graphs are drawn by the --jobs worker processes
+			stats['rows'] = len(render_graphs(emt, nn, args.plot[0], args.plot[1:], path(args.plot_dir), args.plot_format, args.plot_points, args.jobs))
+	return nt, nn, ctt
+
+
+SUMMARY_FIELDS = ('directory', 'node', 'damage', 'base_moment', 'component', 'cycle_types', 'max_cycle_damage', 'error')
+
+
+def _run_case(args, directory):
+	"""Worker of _batch(): run the pipeline for one directory and return its summary rows
+
+	The ERROR and WARNING lines printed by the pipeline, e.g. of a saver which couldn't write
+	its file, go to the error field of the rows.
+	"""
+	# the node tables of the cases would be mixed in the output of the parallel workers
+	output = io.StringIO()
+	with contextlib.redirect_stdout(output):
+		nt, nn, ctt = _run(args, directory)
+	error = '; '.join(line for line in output.getvalue().splitlines() if line.startswith(('ERROR:', 'WARNING:')))
+	rows = []
+	for node in nn:
+		record = nt[node]
+		table = ctt[node] if node in ctt else ()
+		rows.append((directory, node, record.damage, record.base_moment, record.component, len(table), max((i.a for i in table), default=0.0), error))
+	if not rows and error:
+		rows.append((directory, None, None, None, None, None, None, error))
+	return rows
+
+
+def batch_directories(patterns):
+	"""Directories matched by the names or glob patterns, in sorted order without repeats"""
+	directories = []
+	for pattern in patterns:
+		matched = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+		for a in matched:
+			if os.path.isdir(a) and a not in directories:
+				directories.append(a)
+	return directories
+
+
+def save_summary(rows, file):
+	"""Save the summary rows of _batch() into a workbook (.xlsx) or a csv file"""
+	if file.lower().endswith('.xlsx'):
+		wb = openpyxl.Workbook(write_only=True)
+		ws = wb.create_sheet('summary')
+		ws.append(SUMMARY_FIELDS)
+		for row in rows:
+			ws.append(row)
+		wb.save(file)
+	else:
+		with open(file, mode='w', newline='') as f:
+			writer = csv.writer(f)
+			writer.writerow(SUMMARY_FIELDS)
+			writer.writerows(rows)
+
+
+def _batch(args):
+	"""Run the pipeline for every directory of --batch in a pool of --batch-jobs processes and
+	save the worst nodes of every case into --summary. A failed case gets a row with its error.
+	"""
+	directories = batch_directories(args.batch)
+	if not directories:
+		print('WARNING: no directories are matched by {}'.format(' '.join(args.batch)))
+		return
+	# the cache is shared by the cases, it doesn't depend on the directory of a case
+	if args.cache:
+		args.cache = os.path.abspath(args.cache)
+	results = {}
+	with concurrent.futures.ProcessPoolExecutor(max_workers=max(1, min(args.batch_jobs, len(directories)))) as executor:
+		futures = {executor.submit(_run_case, args, directory): directory for directory in directories}
+		for future in concurrent.futures.as_completed(futures):
+			directory = futures[future]
+			try:
+				results[directory] = future.result()
+				print('{}: {} nodes'.format(directory, sum(row[1] is not None for row in results[directory])))
+				if results[directory] and results[directory][0][-1]:
+					print('{}: {}'.format(directory, results[directory][0][-1]))
+			except Exception as e:
+				error = ''.join(traceback.format_exception_only(type(e), e)).strip()
+				results[directory] = [(directory, None, None, None, None, None, None, error)]
+				print('ERROR: {}: {}'.format(directory, error))
+	save_summary([row for directory in directories for row in results[directory]], args.summary)
+
+
+def main():
+	args = parse_args(sys.argv[1:])
+	if args.command == 'query':
+		_query(args)
+		return
+	if args.batch:
+		_batch(args)
+		return
+	if args.watch:
+		try:
+			_watch(args)
+		except KeyboardInterrupt:
+			pass
+		return
+	profiler = PhaseProfiler(args.profile or bool(args.profile_json) or bool(args.cprofile), args.profile_memory, args.cprofile)
+	_run(args, profiler=profiler)
+	if profiler.enabled:
+		profiler.print_table()
+		if args.profile_json:
+			profiler.save(args.profile_json)
 	#emt[nn[0]].plot_graph(ElasticReducedStressRecord.num, ElasticReducedStressRecord.sll, ElasticReducedStressRecord.sfl)
 	
 
 if __name__ == "__main__":
-	main()
\ No newline at end of file
+	main()
@@ -0,0 +1,420 @@
+"""Tests of the parsers of canal.py on synthetic reports of bench.generate()"""
+import bz2
+import csv
+import gzip
+import itertools
+import json
+import lzma
+import math
+import os
+import re
+import sqlite3
+import openpyxl
+import pytest
+try:
+	import numpy as np
+except ImportError:
+	np = None
+import bench
+import canal
+
+
+def node_table(directory):
+	nt = canal.NodeTable()
+	nt.parse_base_moments(str(directory / 'BaseMoments.txt'))
+	return nt
+
+
+def manager_tables(directory, backend='list', engine='mmap', index=False, jobs=1, nodes=None):
+	nt = node_table(directory)
+	lmt = canal.LocalReducedStressManagerTable(nt, backend)
+	emt = canal.ElasticReducedStressManagerTable(nt, lmt, backend)
+	ctt = canal.CycleTypeManagerTable(nt, lmt, emt, backend)
+	for manager_table, parse, name, kwargs in ((lmt, lmt.parse_local_redused_stress_file, bench.LOCAL_FILE, {}),
+	                                           (emt, emt.parse_elastic_reduced_stress_file, bench.ELASTIC_FILE, {}),
+	                                           (ctt, ctt.parse_accumulated_fatigue_damage_file, bench.CYCLE_FILE, {'jobs': jobs})):
+		file = str(directory / name)
+		parse(file, nodes=nodes, engine=engine, index=manager_table.open_index(file) if index else None, **kwargs)
+	return nt, lmt, emt, ctt
+
+
+def as_tuples(*manager_tables):
+	return [[(nodenum, table.as_tuples()) for nodenum, table in manager_table.items()] for manager_table in manager_tables]
+
+
+@pytest.fixture(scope='module')
+def reports(tmp_path_factory):
+	directory = tmp_path_factory.mktemp('reports')
+	bench.generate(str(directory), nodes=80, moments=12, fictitious=3, cycles=15)
+	# a ksi written with a decimal comma is not an integer, the row of the block is read as text
+	file = directory / bench.ELASTIC_FILE
+	lines = file.read_text().split('\n')
+	for i, line in enumerate(lines):
+		tokens = line.split(' ')
+		if i % 7 == 0 and len(tokens) == 10 and tokens[4] != '-':
+			tokens[4] += ',0'
+			lines[i] = ' '.join(tokens)
+	file.write_text('\n'.join(lines))
+	return directory
+
+
+@pytest.fixture(scope='module')
+def reference(reports):
+	return as_tuples(*manager_tables(reports, engine='text')[1:])
+
+
+@pytest.mark.parametrize('backend', ('list', 'array'))
+@pytest.mark.parametrize('engine, index, jobs', (('text', False, 1), ('mmap', False, 1), ('mmap', True, 1), ('mmap', False, 2), ('mmap', True, 2)))
+def test_engines_build_the_same_tables(reports, reference, backend, engine, index, jobs):
+	if backend == 'array' and np is None:
+		pytest.skip('NumPy is required for the array backend')
+	assert as_tuples(*manager_tables(reports, backend, engine, index, jobs)[1:]) == reference
+
+
+@pytest.mark.parametrize('index', (False, True))
+def test_engines_build_the_same_tables_of_nodes(reports, reference, index):
+	nodes = [nodenum for nodenum, table in reference[2]][::5]
+	expected = [[(nodenum, table) for nodenum, table in manager_table if nodenum in nodes] for manager_table in reference]
+	assert as_tuples(*manager_tables(reports, index=index, jobs=2, nodes=nodes)[1:]) == expected
+
+
+def test_jobs_split_the_index(reports, reference, monkeypatch):
+	indexes = []
+	parse_parallel = canal.CycleTypeManagerTable._parse_parallel
+	def spy(self, file, nodes, index, *args):
+		indexes.append(index)
+		return parse_parallel(self, file, nodes, index, *args)
+	monkeypatch.setattr(canal.CycleTypeManagerTable, '_parse_parallel', spy)
+	nt, lmt, emt, ctt = manager_tables(reports, index=True, jobs=2)
+	assert indexes and all(index is not None for index in indexes)
+	assert as_tuples(ctt) == reference[2:]
+
+
+@pytest.mark.skipif(np is None, reason='NumPy is required for ModelStore')
+@pytest.mark.parametrize('limit, max_rows', ((None, None), (1E-6, None), (None, 4), (1E-4, 2)))
+def test_store_tables_are_views_of_the_mapping(reports, reference, tmp_path, limit, max_rows):
+	nt, lmt, emt, ctt = manager_tables(reports)
+	store = canal.ModelStore.compile(str(tmp_path / 'store'), nt, lmt, emt, ctt)
+	lmt, emt, ctt = store.manager_tables(nt, None, limit, max_rows)
+	assert as_tuples(lmt, emt) == reference[:2]
+	assert as_tuples(ctt) == [[(nodenum, canal.CycleTypeManagerTable.bound_records(table, limit, max_rows)) for nodenum, table in reference[2]]]
+	data = store._load('cycles')
+	assert all(np.shares_memory(table.data, data) for table in ctt.values() if len(table))
+
+
+@pytest.mark.skipif(np is None, reason='NumPy is required for ModelStore')
+def test_store_copies_the_tables_into_the_list_backend(reports, reference, tmp_path):
+	nt, lmt, emt, ctt = manager_tables(reports)
+	store = canal.ModelStore.compile(str(tmp_path / 'store'), nt, lmt, emt, ctt)
+	tables = store.manager_tables(nt, None, 1E-4, 2, 'list')
+	assert [manager_table.backend for manager_table in tables] == ['list'] * 3
+	assert as_tuples(*tables) == as_tuples(*store.manager_tables(nt, None, 1E-4, 2))
+	assert all(isinstance(table, canal.CycleTypeTable) for table in tables[2].values())
+
+
+@pytest.mark.skipif(np is None, reason='NumPy is required for ModelStore and ParseCache')
+def test_length_of_tables_is_taken_from_the_offsets(reports, tmp_path):
+	nt, lmt, emt, ctt = manager_tables(reports, 'array')
+	# only the table of the first node keeps all rows
+	longest = next(iter(lmt))
+	for nodenum, table in lmt.items():
+		if nodenum != longest:
+			table.set_columns(table.column('num')[:5], table.column('temp')[:5], table.stress[:5])
+	store = canal.ModelStore.compile(str(tmp_path / 'store'), nt, lmt, emt, ctt)
+	compact = lmt.to_compact()
+	for nodes, length in ((None, 12), ([nodenum for nodenum in lmt if nodenum != longest], 5)):
+		assert store.manager_tables(nt, nodes)[0].length_of_tables == length
+		cached = canal.LocalReducedStressManagerTable(nt, 'array')
+		canal.ParseCache(str(tmp_path / 'cache')).load_manager_table(cached, lambda file: cached.load_compact(compact), str(reports / bench.LOCAL_FILE), (), nodes)
+		assert cached.length_of_tables == length
+
+
+@pytest.mark.parametrize('backend', ('list', 'array'))
+def test_tail_does_not_parse_a_part_of_a_row(tmp_path, backend):
+	bench.generate(str(tmp_path), nodes=5, moments=10, fictitious=2, cycles=20)
+	nt = node_table(tmp_path)
+	file = str(tmp_path / bench.CYCLE_FILE)
+	ctt = canal.CycleTypeManagerTable(nt, None, None, backend)
+	with ctt.scanner(file) as scanner:
+		nodenum, start, end = list(scanner.nodes())[-1]
+		offset = scanner.find_table(start, end, nt[nodenum].component, nt[nodenum].base_moment)
+		rows = list(itertools.islice(scanner.rows(offset), 3))
+	with open(file, mode='rb') as f:
+		data = f.read()
+	# the report is being written in the middle of the damage of the third row, e.g. '6,6459E-10' is '6,64' yet
+	row = data.index(b' '.join(rows[2][:-1]).replace(b'.', b','), offset)
+	cut = data.index(b'\n', row) - len(rows[2][-1]) + 4
+	with open(file, mode='wb') as f:
+		f.write(data[:cut])
+	tail = canal.ReportTail(ctt.scanner(file), lambda start, end: ctt._parse_scanned(file, None, None, start, end))
+	assert nodenum in tail.update()
+	assert ctt[nodenum].as_tuples() == [
+		(int(i[0]), int(i[2]), float(i[7]), float(i[5]), float(i[6]), float(i[9]), float(i[8]), float(i[10]), float(i[19]), float(i[20]), float(i[21]))
+		for i in sorted(rows[:2], key=lambda a: -float(a[21]))]
+
+
+@pytest.mark.parametrize('engine, index, jobs', (('text', False, 1), ('mmap', False, 1), ('mmap', False, 2), ('mmap', True, 1), ('mmap', True, 2)))
+def test_parsers_count_the_bytes_they_read(reports, reference, engine, index, jobs):
+	sizes = [os.path.getsize(str(reports / name)) for name in (bench.LOCAL_FILE, bench.ELASTIC_FILE, bench.CYCLE_FILE)]
+	read = [manager_table.read_bytes for manager_table in manager_tables(reports, engine=engine, index=index, jobs=jobs)[1:]]
+	if not index:
+		assert read == sizes
+	else:
+		# the index skips the headers and the tables of the other base moments
+		assert all(0 < a < b for a, b in zip(read, sizes))
+		nodes = [nodenum for nodenum, table in reference[2]][:2]
+		assert all(0 < manager_table.read_bytes < a / 10 for manager_table, a in zip(manager_tables(reports, engine=engine, index=index, jobs=jobs, nodes=nodes)[1:], read))
+
+
+@pytest.mark.skipif(np is None, reason='NumPy is required for ParseCache')
+def test_profiler_reports_the_bytes_read_by_every_phase(reports, reference, tmp_path):
+	nodes = [str(nodenum) for nodenum, table in reference[2][:3]]
+	args = canal.parse_args(['--cache', str(tmp_path / 'cache'), '--format', 'csv', '--outfile', str(tmp_path / 'table.csv'), '-l'] + nodes)
+	for i in range(2):
+		profiler = canal.PhaseProfiler()
+		canal._run(args, str(reports), profiler)
+		phases = {stats['phase']: stats for stats in profiler.phases}
+		assert all(phases[name]['file_bytes'] > 0 and phases[name]['read_bytes'] > 0 for name in ('base_moments', 'local', 'elastic', 'cycles'))
+
+
+def test_batch_case_keeps_its_errors_and_warnings(reports, reference, tmp_path, monkeypatch):
+	nodes = [str(nodenum) for nodenum, table in reference[2][:3]]
+	args = canal.parse_args(['--no-index', '--format', 'csv', '--outfile', str(tmp_path / 'table.csv'), '-l'] + nodes)
+	rows = canal._run_case(args, str(reports))
+	assert [row[1] for row in rows] == list(map(int, nodes)) and all(row[-1] == '' for row in rows)
+	# a saver prints its error and returns when the file can't be written
+	monkeypatch.setitem(canal.SAVERS, 'xlsx', lambda *args, **kwargs: print('ERROR: Please close the excel file'))
+	args = canal.parse_args(['--no-index', '--outfile', str(tmp_path / 'table.xlsx'), '-l', '999999'] + nodes)
+	rows = canal._run_case(args, str(reports))
+	assert len(rows) == 3
+	assert all(row[-1] == 'WARNING: node 999999 is not found in BaseMoments; ERROR: Please close the excel file' for row in rows)
+
+
+@pytest.mark.parametrize('max_rows', ('0', '-3'))
+def test_max_rows_must_be_positive(max_rows):
+	with pytest.raises(SystemExit):
+		canal.parse_args(['--max-rows', max_rows])
+	assert canal.parse_args(['--max-rows', '1']).max_rows == 1
+
+
+def linear_search_real_id(elastic_table, local_table, component, stress):
+	"""search_real_id() as a scan of all records, the last matching local moment of the first matching elastic record"""
+	for item in elastic_table.values():
+		if math.isclose(item.sfl, stress, abs_tol=1E-4):
+			rid = None
+			for key, values in local_table.items():
+				if math.isclose(item.temp, values.temp, abs_tol=1E-2) and math.isclose(item.sll, values.vec[2+component], abs_tol=1E-4):
+					rid = key
+			return rid
+	return None
+
+
+@pytest.mark.parametrize('backend', ('list', 'array'))
+def test_expansion_index_finds_the_ids_of_a_linear_scan(reports, backend):
+	nt, lmt, emt, ctt = manager_tables(reports)
+	# the manager tables keep weak references to each other
+	tables = manager_tables(reports, backend)
+	found = 0
+	for nodenum, elastic_table in emt.items():
+		component = nt[nodenum].component
+		stresses = [i.sfl for i in elastic_table.values()] + [i.vec[2+component] for i in lmt[nodenum].values()]
+		for stress in stresses + [a + 5E-5 for a in stresses] + [a + 3E-4 for a in stresses]:
+			expected = linear_search_real_id(elastic_table, lmt[nodenum], component, stress)
+			assert tables[2][nodenum].search_real_id(stress) == expected
+			found += expected is not None
+	assert found
+
+
+@pytest.mark.skipif(np is None, reason='NumPy is required for the index sidecars')
+@pytest.mark.parametrize('manager_type, name', ((canal.LocalReducedStressManagerTable, bench.LOCAL_FILE),
+                                                (canal.ElasticReducedStressManagerTable, bench.ELASTIC_FILE),
+                                                (canal.CycleTypeManagerTable, bench.CYCLE_FILE)))
+def test_index_is_loaded_until_the_report_changes(tmp_path, manager_type, name):
+	bench.generate(str(tmp_path), nodes=20, moments=6, fictitious=2, cycles=8)
+	file = str(tmp_path / name)
+	built = manager_type.open_index(file)
+	loaded = canal.ReportIndex.load(file)
+	assert loaded is not None and loaded.data == built.data
+	st = os.stat(file)
+	os.utime(file, ns=(st.st_atime_ns, st.st_mtime_ns + 1000))
+	assert canal.ReportIndex.load(file) is None
+	assert manager_type.open_index(file).data == built.data
+	assert canal.ReportIndex.load(file) is not None
+	# a damaged sidecar is not used
+	with open(canal.ReportIndex.sidecar_name(file) + '.npy', mode='r+b') as f:
+		f.truncate(64)
+	assert canal.ReportIndex.load(file) is None
+
+
+@pytest.mark.skipif(np is None, reason='NumPy is required for ParseCache')
+def test_cache_is_missed_after_a_change_of_the_report(tmp_path):
+	directory = tmp_path / 'reports'
+	bench.generate(str(directory), nodes=20, moments=6, fictitious=2, cycles=8)
+	nt = node_table(directory)
+	file = str(directory / bench.LOCAL_FILE)
+	parsed = []
+	def load():
+		# every run fingerprints the files again
+		cache = canal.ParseCache(str(tmp_path / 'cache'))
+		lmt = canal.LocalReducedStressManagerTable(nt)
+		cache.load_manager_table(lmt, lambda f: parsed.append(f) or lmt.parse_local_redused_stress_file(f), file, (str(directory / 'BaseMoments.txt'),))
+		return as_tuples(lmt)
+	expected = load()
+	assert load() == expected and len(parsed) == 1
+	# the same size and mtime with another stress
+	st = os.stat(file)
+	text = (directory / bench.LOCAL_FILE).read_text()
+	(directory / bench.LOCAL_FILE).write_text(re.sub(r'(,\d*)(\d)$', lambda a: a.group(1) + str((int(a.group(2)) + 1) % 10), text, flags=re.M))
+	os.utime(file, ns=(st.st_atime_ns, st.st_mtime_ns))
+	assert load() != expected and len(parsed) == 2
+
+
+@pytest.mark.skipif(np is None, reason='NumPy is required for ParseCache')
+def test_cache_removes_the_least_recently_used_entries(tmp_path):
+	cache = canal.ParseCache(str(tmp_path), max_size=20000)
+	cache.put('a', values=np.zeros(1000))
+	cache.put('b', values=np.zeros(1000))
+	os.utime(cache._path('a'), ns=(0, 1000))
+	os.utime(cache._path('b'), ns=(0, 2000))
+	assert cache.get('a', ('values',)) is not None
+	cache.put('c', values=np.zeros(1000))
+	assert cache.get('b', ('values',)) is None
+	assert cache.get('a', ('values',)) is not None and cache.get('c', ('values',)) is not None
+	cache.put('d', values=np.zeros(4000))
+	assert sorted(os.listdir(tmp_path)) == ['d.npz']
+
+
+def workbook_sheets(file):
+	return [(ms.title, ms.sheet_properties.tabColor, sorted(map(str, ms.merged_cells.ranges)),
+	         {column: dimension.width for column, dimension in ms.column_dimensions.items()},
+	         [[(cell.value, cell.number_format, cell.font.name, cell.font.sz, cell.border.left.style, cell.alignment.horizontal) for cell in row] for row in ms.iter_rows()])
+	        for ms in openpyxl.load_workbook(file)]
+
+
+def test_write_only_workbook_is_the_in_memory_one(reports, reference, tmp_path):
+	nt, lmt, emt, ctt = manager_tables(reports)
+	nodes = [nodenum for nodenum, table in reference[2]][:4]
+	for write_only in (True, False):
+		canal.save_in_workbook(ctt, nodes, str(tmp_path / '{}.xlsx'.format(write_only)), write_only=write_only)
+	sheets = workbook_sheets(str(tmp_path / 'True.xlsx'))
+	assert [sheet[0] for sheet in sheets] == ['Sheet'] + ['{}n'.format(nodenum) for nodenum in nodes]
+	assert sheets == workbook_sheets(str(tmp_path / 'False.xlsx'))
+
+
+@pytest.mark.parametrize('output_format', ('csv', 'jsonl', 'parquet'))
+def test_exports_keep_the_rows_of_the_cycle_tables(reports, reference, tmp_path, output_format):
+	if output_format == 'parquet' and canal.pa is None:
+		pytest.skip('pyarrow is required for the parquet format')
+	nt, lmt, emt, ctt = manager_tables(reports)
+	nodes = [nodenum for nodenum, table in reference[2]][:4]
+	rows = [dict(zip(canal.CYCLE_TYPE_FIELDS, row)) for row in canal.cycle_type_long_rows(ctt, nodes)]
+	assert rows and {row['node'] for row in rows} == set(nodes)
+	file = str(tmp_path / 'table.{}'.format(output_format))
+	canal.SAVERS[output_format](ctt, nodes, file)
+	if output_format == 'csv':
+		with open(file, newline='', encoding='utf-8') as f:
+			assert list(csv.reader(f)) == [list(canal.CYCLE_TYPE_FIELDS)] + [['' if value is None else str(value) for value in row.values()] for row in rows]
+	elif output_format == 'jsonl':
+		with open(file, encoding='utf-8') as f:
+			assert [json.loads(line) for line in f] == rows
+	else:
+		assert canal.pq.read_table(file).to_pylist() == rows
+
+
+@pytest.mark.parametrize('compress', (gzip.compress, lzma.compress, bz2.compress))
+def test_compressed_reports_build_the_same_tables(reports, reference, tmp_path, compress):
+	for name in ('BaseMoments.txt', bench.LOCAL_FILE, bench.ELASTIC_FILE, bench.CYCLE_FILE):
+		(tmp_path / name).write_bytes(compress((reports / name).read_bytes()))
+	# the index and the mapped engine are not used for compressed reports
+	assert as_tuples(*manager_tables(tmp_path, index=True, jobs=2)[1:]) == reference
+
+
+@pytest.mark.parametrize('index', (False, True))
+def test_calculation_model_keeps_the_least_recently_used_nodes(reports, reference, index):
+	expected = [dict(manager_table) for manager_table in reference]
+	first, second, third = [nodenum for nodenum, table in reference[2]][:3]
+	model = canal.CalculationModel(str(reports), cache_size=2, index=index)
+	tables = model.node(first)
+	model.node(second)
+	assert model.node(first) == tables and model.cached_nodes == [second, first]
+	model.node(third)
+	assert model.cached_nodes == [first, third]
+	assert second not in model.cycle_type_manager_table and second in model.node_table
+	for nodenum in (second, first):
+		assert [table.as_tuples() for table in model.node(nodenum)] == [tables[nodenum] for tables in expected]
+	assert model.cached_nodes == [second, first]
+	with pytest.raises(KeyError):
+		model.node(999999)
+	with pytest.raises(ValueError):
+		canal.CalculationModel(str(reports), cache_size=0)
+
+
+@pytest.mark.skipif(np is None, reason='NumPy is required for minmax_indices')
+@pytest.mark.parametrize('n, max_points', ((10, None), (10, 20), (1001, 5), (1024, 100), (4097, 2000)))
+def test_minmax_indices_keep_the_extrema(n, max_points):
+	values = np.random.default_rng(n).normal(size=n).cumsum()
+	indices = canal.minmax_indices(values, max_points)
+	if max_points is None or n <= max_points:
+		assert indices.tolist() == list(range(n))
+		return
+	assert np.all(np.diff(indices) > 0) and len(indices) <= max_points + 2
+	assert indices[0] == 0 and indices[-1] == n - 1
+	# every bucket keeps its minimum and maximum
+	size = -(-n // (max_points // 2))
+	kept = set(indices.tolist())
+	for start in range(0, n, size):
+		bucket = values[start:start + size]
+		assert start + bucket.argmin() in kept and start + bucket.argmax() in kept
+
+
+@pytest.mark.skipif(np is None, reason='NumPy is required for DamageAnalytics')
+def test_damage_analytics_sums_around_empty_nodes():
+	# nodes 1, 3 and 5 have no cycle types, the last one at the end of the column
+	analytics = canal.DamageAnalytics((1, 2, 3, 4, 5), (0, 0, 2, 2, 5, 5), (0.25, 0.5, 0.1, 0.3, 0.2), (0.0, 0.75, 0.1, 0.6, np.nan))
+	assert analytics.cycle_types.tolist() == [0, 2, 0, 3, 0]
+	assert analytics.totals.tolist() == pytest.approx([0.0, 0.75, 0.0, 0.6, 0.0])
+	share = analytics.dominant_share
+	assert np.isnan(share[[0, 2, 4]]).all() and share[[1, 3]].tolist() == pytest.approx([0.5 / 0.75, 0.3 / 0.6])
+	assert analytics.mismatch().tolist() == [False, False, True, False, False]
+
+
+@pytest.mark.skipif(np is None, reason='NumPy is required for DamageAnalytics')
+@pytest.mark.parametrize('backend', ('list', 'array'))
+def test_damage_analytics_of_a_manager_table(reports, backend):
+	nt, lmt, emt, ctt = manager_tables(reports, backend)
+	for nodenum in list(ctt)[::4]:
+		ctt.pop(nodenum)
+		canal.CycleTypeManagerTable.TABLE_TYPES[backend](nodenum, ctt)
+	analytics = canal.DamageAnalytics.from_manager_table(ctt)
+	assert analytics.nodes.tolist() == list(ctt)
+	assert analytics.totals.tolist() == pytest.approx([math.fsum(row[-1] for row in table.as_tuples()) for table in ctt.values()])
+	assert analytics.expected.tolist() == [nt[nodenum].damage for nodenum in ctt]
+
+
+@pytest.mark.parametrize('backend', ('list', 'array'))
+def test_sqlite_store_answers_the_queries_of_the_tables(reports, reference, tmp_path, backend):
+	if backend == 'array' and np is None:
+		pytest.skip('NumPy is required for the array backend')
+	nt, lmt, emt, ctt = manager_tables(reports)
+	with canal.SQLiteStore.compile(str(tmp_path / 'model.db'), nt, lmt, emt, ctt) as database:
+		assert as_tuples(*database.manager_tables(database.node_table(backend), backend=backend)) == reference
+		nodes = [nodenum for nodenum, table in reference[2]][::3]
+		assert as_tuples(*database.manager_tables(nt, nodes, 1E-4, 2, backend)) == [
+			[(nodenum, table) for nodenum, table in reference[0] if nodenum in nodes],
+			[(nodenum, table) for nodenum, table in reference[1] if nodenum in nodes],
+			[(nodenum, canal.CycleTypeManagerTable.bound_records(table, 1E-4, 2)) for nodenum, table in reference[2] if nodenum in nodes]]
+		records = sorted(nt.to_compact(), key=lambda a: -a[1])
+		assert database.nodes() == records
+		assert database.nodes(damage_above=0.01, component=2, limit=5) == [a for a in records if a[1] > 0.01 and a[3] == 2][:5]
+		# the real ids are the moments of the rows of the output tables
+		real_ids = {nodenum: ['{}-{}'.format(*a) for a in database.execute('SELECT real_fid, real_sid FROM cycles WHERE node = ? ORDER BY position', (nodenum,))] for nodenum in ctt}
+		assert real_ids == {nodenum: [row[0] for row in canal.cycle_type_rows(ctt, nodenum, -1)] for nodenum in ctt}
+		assert any(a[0] > 12 or a[1] > 12 for table in ctt.values() for a in table.as_tuples())
+		worst = {nodenum: ids[0].split('-') for nodenum, ids in real_ids.items() if ids}
+		assert sorted(a[0] for a in database.nodes(moment=6)) == sorted(nodenum for nodenum, ids in worst.items() if '6' in ids)
+		cycle_types = database.cycle_types(moment=6, nodes=nodes)
+		assert cycle_types and all(a[0] in nodes and 6 in a[-2:] for a in cycle_types)
+		assert [a[-3] for a in cycle_types] == sorted((a[-3] for a in cycle_types), reverse=True)
+		with pytest.raises(sqlite3.OperationalError):
+			database.execute('DELETE FROM nodes')
+		assert len(database.nodes()) == len(nt)